@@ -0,0 +1,141 @@
+"""
+Запуск приложения: python -m tamagotchi (из каталога src).
+
+Без аргументов запускается GUI; команда simulate выполняет ускоренную имитацию без GUI:
+
+    python -m tamagotchi simulate --creatures 10000 --days 30 --kind Кот --jobs 4 --storage pets.db
+
+Команда serve запускает сервер питомцев многих игроков (см. test/manual/server.py), loadgen — нагрузку на него:
+
+    python -m tamagotchi serve --storage pets.db --port 8765
+    python -m tamagotchi loadgen --clients 200 --requests 100 --port 8765
+
+Модули приложения пока находятся в test/manual; GUI (tkinter, изображения) импортируется только при запуске, а не при импорте пакета.
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from sys import path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+path.insert(1, str(ROOT_DIR / 'test/manual'))
+
+
+def parser() -> ArgumentParser:
+    result = ArgumentParser(prog='tamagotchi', description='Тамагочи')
+    commands = result.add_subparsers(dest='command')
+    commands.add_parser('gui', help='запустить GUI (по умолчанию)')
+    simulate = commands.add_parser('simulate', help='ускоренная имитация без GUI')
+    simulate.add_argument('--creatures', type=int, default=1000, help='число новых существ')
+    simulate.add_argument('--days', type=int, default=30, help='на сколько ИД продвинуть существ')
+    simulate.add_argument(
+        '--kind', action='append',
+        help='вид новых существ; можно указать несколько раз, по умолчанию — все виды',
+    )
+    simulate.add_argument('--jobs', type=int, default=None, help='число процессов; 0 — без пула процессов')
+    simulate.add_argument('--autosave-days', type=int, default=1, help='период записи в историю и сохранения, ИД')
+    simulate.add_argument('--storage', type=Path, default=None, help='база SQLite для сохранения существ')
+    simulate.add_argument(
+        '--load', action='store_true',
+        help='продвинуть существ, сохранённых в --storage (с учётом --kind), вместо создания новых',
+    )
+    simulate.add_argument(
+        '--metrics', type=Path, default=None,
+        help='включить замеры и записать их в файл в формате Prometheus (замеры ведутся только в текущем процессе: --jobs 0)',
+    )
+    simulate.add_argument(
+        '--tick-budget', type=float, default=None,
+        help='бюджет вызова CreaturePool.update, с: профили более долгих вызовов сохраняются в каталог profiles',
+    )
+    serve = commands.add_parser('serve', help='сервер питомцев многих игроков')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--unix', default=None, help='Unix-сокет вместо TCP')
+    serve.add_argument('--storage', type=Path, default=Path('pets.db'), help='база SQLite для сохранения питомцев')
+    serve.add_argument(
+        '--idle-seconds', type=float, default=300,
+        help='через сколько секунд без обращений питомец сохраняется и выгружается',
+    )
+    serve.add_argument(
+        '--autosave-window', type=float, default=1.0,
+        help='окно объединения фоновых сохранений после действий игрока, с; 0 — без фонового сохранения',
+    )
+    loadgen = commands.add_parser('loadgen', help='нагрузка на сервер питомцев')
+    loadgen.add_argument('--host', default='127.0.0.1')
+    loadgen.add_argument('--port', type=int, default=8765)
+    loadgen.add_argument('--unix', default=None, help='Unix-сокет вместо TCP')
+    loadgen.add_argument('--clients', type=int, default=100, help='число одновременных клиентов')
+    loadgen.add_argument('--requests', type=int, default=100, help='запросов от каждого клиента')
+    loadgen.add_argument('--kind', default='Кот', help='вид создаваемых питомцев')
+    return result
+
+
+def main(args: list[str] = None):
+    options = parser().parse_args(args)
+    if options.command in (None, 'gui'):
+        from view import main as gui
+        gui()
+        return
+    if options.command in ('serve', 'loadgen'):
+        import asyncio
+        if options.command == 'loadgen':
+            from loadgen import run
+            print(asyncio.run(run(options.clients, options.requests, options.kind, options.host, options.port, options.unix)))
+            return
+        from controller import LoadCreature
+        from server import PetServer
+        from storage import SQLiteStorage
+        LoadCreature.backend = SQLiteStorage(options.storage)
+        autosave = None
+        if options.autosave_window > 0:
+            LoadCreature.autosave_window = options.autosave_window
+            autosave = LoadCreature.autosave()
+        server = PetServer(idle_seconds=options.idle_seconds, autosave=autosave)
+        try:
+            asyncio.run(server.serve(options.host, options.port, options.unix))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if autosave is not None:
+                autosave.close()
+            LoadCreature.backend.close()
+        return
+    if options.autosave_days <= 0 or options.days < 0 or options.creatures < 0:
+        parser().error('--days, --creatures и --autosave-days не могут быть отрицательными, --autosave-days — нулём')
+
+    from controller import kinds
+    from headless import simulate_parallel
+
+    names = options.kind or [entry.name for entry in kinds()]
+    unknown = [name for name in names if name not in {entry.name for entry in kinds()}]
+    if unknown:
+        parser().error(f"неизвестные виды: {', '.join(unknown)}")
+    ids = None
+    if options.load:
+        if options.storage is None:
+            parser().error('--load требует --storage')
+        from storage import SQLiteStorage
+        storage = SQLiteStorage(options.storage)
+        ids = [creature_id for name in names for creature_id in storage.ids(kind=name)]
+        storage.close()
+    registry = None
+    if options.metrics is not None:
+        import metrics
+        registry = metrics.enable(tick_budget=options.tick_budget)
+    report = simulate_parallel(
+        names,
+        options.creatures,
+        options.days,
+        options.jobs,
+        options.autosave_days,
+        options.storage,
+        ids,
+    )
+    print(report)
+    if registry is not None:
+        print(registry.snapshot())
+        registry.write_prometheus(options.metrics)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+"""
+Набор замеров производительности модели, контроллера и GUI.
+
+Запуск из каталога test:
+
+    python -m bench run --output bench/baselines/current.json
+    python -m bench compare bench/baselines/reference.json bench/baselines/current.json --threshold 0.15
+
+Отдельные скрипты в этом каталоге (pool.py, memory.py, resize.py, importtime.py) по-прежнему запускаются сами по себе.
+"""
+
+from pathlib import Path
+from sys import path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+if str(ROOT_DIR / 'test/manual') not in path:
+    path.insert(1, str(ROOT_DIR / 'test/manual'))
@@ -0,0 +1,106 @@
+"""Командная строка набора замеров: run — выполнить и сохранить результаты, compare — сравнить с базовыми."""
+
+import platform
+from argparse import ArgumentParser
+from datetime import datetime as dt
+from json import dump, load
+from pathlib import Path
+from random import Random
+from sys import exit
+
+from .suite import BENCHMARKS, Skipped
+
+
+def run(names: list[str], seed: int, repeat: int) -> dict:
+    results = {}
+    for name in names:
+        print(f'{name} ...', end=' ', flush=True)
+        try:
+            metrics = BENCHMARKS[name](Random(seed), repeat)
+        except Skipped as exc:
+            print(f'пропущено: {exc}')
+            results[name] = {'skipped': str(exc)}
+            continue
+        results[name] = {
+            metric: {'value': value, 'unit': unit, 'higher_is_better': higher}
+            for metric, (value, unit, higher) in metrics.items()
+        }
+        print(', '.join(f'{metric} {_format(value)} {unit}' for metric, (value, unit, _) in metrics.items()))
+    return {
+        'meta': {
+            'date': dt.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Печатает изменения показателей и возвращает ухудшившиеся больше чем на долю threshold."""
+    regressions = []
+    print(f"{'показатель':<52}{'база':>14}{'сейчас':>14}{'изменение':>11}")
+    for name, metrics in current['results'].items():
+        base_metrics = baseline['results'].get(name)
+        if base_metrics is None or 'skipped' in metrics or 'skipped' in base_metrics:
+            continue
+        for metric, data in metrics.items():
+            base = base_metrics.get(metric)
+            if base is None or not base['value']:
+                continue
+            change = (data['value'] - base['value']) / base['value']
+            worse = -change if data['higher_is_better'] else change
+            flag = ''
+            if worse > threshold:
+                flag = '  регрессия'
+                regressions.append(f'{name}.{metric}')
+            print(f"{f'{name}.{metric}':<52}{_format(base['value']):>14}{_format(data['value']):>14}{change:>+11.1%}{flag}")
+    return regressions
+
+
+def _format(value: float) -> str:
+    return f'{value:,.0f}' if abs(value) >= 1000 else f'{value:.4g}'
+
+
+def main(args: list[str] = None):
+    parser = ArgumentParser(prog='bench', description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='выполнить замеры')
+    run_parser.add_argument('names', nargs='*', help='замеры (по умолчанию — все): ' + ', '.join(BENCHMARKS))
+    run_parser.add_argument('--output', type=Path, help='файл JSON для результатов')
+    run_parser.add_argument('--seed', type=int, default=20240501)
+    run_parser.add_argument('--repeat', type=int, default=3)
+    compare_parser = commands.add_parser('compare', help='сравнить результаты с базовыми')
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('current', type=Path)
+    compare_parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='допустимое ухудшение показателя, доля (по умолчанию 0.1)',
+    )
+    options = parser.parse_args(args)
+
+    if options.command == 'run':
+        unknown = [name for name in options.names if name not in BENCHMARKS]
+        if unknown:
+            parser.error(f"неизвестные замеры: {', '.join(unknown)}")
+        report = run(options.names or list(BENCHMARKS), options.seed, options.repeat)
+        if options.output is not None:
+            options.output.parent.mkdir(parents=True, exist_ok=True)
+            with open(options.output, 'w', encoding='utf-8') as file:
+                dump(report, file, ensure_ascii=False, indent=2)
+        return
+    with open(options.baseline, encoding='utf-8') as file:
+        baseline = load(file)
+    with open(options.current, encoding='utf-8') as file:
+        current = load(file)
+    regressions = compare(baseline, current, options.threshold)
+    if regressions:
+        print(f"регрессии больше {options.threshold:.0%}: {', '.join(regressions)}")
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Замер времени импорта модулей по данным python -X importtime.
+
+Каждый модуль импортируется в отдельном процессе repeat раз, выводится наименьшее из полученных значений.
+Также проверяется, что модули, нужные без GUI, не импортируют tkinter и другие модули, загружаемые по требованию.
+"""
+
+import subprocess
+from compileall import compile_dir
+from pathlib import Path
+from sys import argv, executable, path
+
+ROOT_DIR = Path(path[0]).parent.parent
+
+MODULES = ('model', 'controller', 'simulation', 'storage', 'view')
+# модули, которые не должны загружаться при импорте модуля без обращения к соответствующим возможностям
+DEFERRED = ('tkinter', 'tomllib', 'sqlite3', 'concurrent.futures.process')
+
+
+def import_time(module: str) -> tuple[int, dict[str, int]]:
+    """Суммарное время импорта module в мкс и собственное время каждого импортированного им модуля."""
+    result = subprocess.run(
+        [executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT_DIR / 'test/manual',
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total, own = 0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line.removeprefix('import time:').split('|')
+        name = name.strip()
+        own[name] = int(self_us)
+        if name == module:
+            total = int(cumulative)
+    return total, own
+
+
+def main(repeat: int = 5, top: int = 5):
+    # без готового байт-кода в замер попадёт компиляция модулей (например, при PYTHONDONTWRITEBYTECODE)
+    compile_dir(ROOT_DIR / 'test/manual', quiet=1)
+    for module in MODULES:
+        runs = [import_time(module) for _ in range(repeat)]
+        total, own = min(runs, key=lambda run: run[0])
+        slowest = sorted(own.items(), key=lambda item: item[1], reverse=True)[:top]
+        print(f'{module}: {total / 1000:.1f} мс, модулей: {len(own)}')
+        print('    ' + ', '.join(f'{name} {us / 1000:.1f}' for name, us in slowest))
+        if module != 'view':
+            loaded = [name for name in DEFERRED if name in own]
+            if loaded:
+                print(f'    импортированы заранее: {", ".join(loaded)}')
+
+
+if __name__ == '__main__':
+    main(*map(int, argv[1:]))
@@ -0,0 +1,30 @@
+"""Замер памяти, занимаемой одним существом."""
+
+import tracemalloc
+from pathlib import Path
+from sys import argv, path
+
+ROOT_DIR = Path(path[0]).parent.parent
+path.insert(1, str(ROOT_DIR / 'test/manual'))
+
+import model
+from controller import loaded_kinds
+
+
+def bytes_per_creature(kind: model.Kind, number: int = 10_000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    creatures = [model.Creature(kind, f'#{i}') for i in range(number)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del creatures
+    return (after - before) / number
+
+
+def main(number: int = 10_000):
+    for kind in (entry.kind for entry in loaded_kinds):
+        print(f'{kind.name}: {bytes_per_creature(kind, number):.0f} байт на существо')
+
+
+if __name__ == '__main__':
+    main(*map(int, argv[1:]))
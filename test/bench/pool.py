@@ -0,0 +1,26 @@
+"""Замер пропускной способности CreaturePool: тактов существ в секунду."""
+
+from pathlib import Path
+from sys import argv, path
+from time import perf_counter
+
+ROOT_DIR = Path(path[0]).parent.parent
+path.insert(1, str(ROOT_DIR / 'test/manual'))
+
+import model
+from controller import loaded_kinds
+
+
+def main(creatures: int = 100_000, ticks: int = 50):
+    kinds = [entry.kind for entry in loaded_kinds]
+    pool = model.CreaturePool()
+    for i in range(creatures):
+        pool.add(model.Creature(kinds[i % len(kinds)], f'#{i}'))
+    start = perf_counter()
+    pool.update(ticks)
+    elapsed = perf_counter() - start
+    print(f'{creatures} существ × {ticks} тактов: {elapsed:.3f} с, {creatures * ticks / elapsed:,.0f} тактов существ/с')
+
+
+if __name__ == '__main__':
+    main(*map(int, argv[1:]))
@@ -0,0 +1,58 @@
+"""Замер масштабирования изображений из data/images: попиксельный цикл против пакетного."""
+
+from pathlib import Path
+from sys import path
+from time import perf_counter
+from tkinter import Tk, PhotoImage, TclError
+
+ROOT_DIR = Path(path[0]).parent.parent
+path.insert(1, str(ROOT_DIR / 'test/manual'))
+
+import images
+
+
+def resize_per_pixel(
+        image: PhotoImage,
+        old_width: int,
+        old_height: int,
+        new_width: int,
+        new_height: int
+) -> PhotoImage:
+    """Прежняя реализация масштабирования: по два обращения к Tcl на каждый пиксель."""
+    resized_image = PhotoImage(width=new_width, height=new_height)
+    for x in range(new_width):
+        for y in range(new_height):
+            x_old = x * old_width // new_width
+            y_old = y * old_height // new_height
+            rgb = '#{:02x}{:02x}{:02x}'.format(*image.get(x_old, y_old))
+            resized_image.put(rgb, (x, y))
+    return resized_image
+
+
+def measure(func, *args, **kwargs) -> float:
+    start = perf_counter()
+    func(*args, **kwargs)
+    return perf_counter() - start
+
+
+def main(sizes: tuple[int, ...] = (65, 200, 400)):
+    try:
+        root = Tk()
+    except TclError as exc:
+        print(f'пропущено: нет дисплея ({exc})')
+        return
+    root.withdraw()
+    print(f"{'файл':<16}{'размер':>8}{'до, с':>10}{'после, с':>10}{'билин., с':>11}{'ускорение':>11}")
+    for img_path in sorted((ROOT_DIR / 'data/images').glob('*.png')):
+        img = PhotoImage(file=img_path)
+        w, h = img.width(), img.height()
+        for size in sizes:
+            before = measure(resize_per_pixel, img, w, h, size, size)
+            after = measure(images.resize_image, img, w, h, size, size)
+            bilinear = measure(images.resize_image, img, w, h, size, size, method='bilinear')
+            print(f'{img_path.name:<16}{size:>8}{before:>10.3f}{after:>10.4f}{bilinear:>11.4f}{before / after:>10.0f}x')
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+Замеры набора bench.
+
+Каждый замер — функция, принимающая генератор случайных чисел с фиксированным зерном и число повторов; она возвращает словарь показателей Metric.
+Для скоростей берётся лучший из повторов, для задержек — процентили по всем измерениям.
+"""
+
+from collections.abc import Callable
+from pathlib import Path
+from random import Random
+from statistics import quantiles
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import NamedTuple
+
+from . import ROOT_DIR
+
+import model
+from controller import LoadCreature, kinds
+
+
+class Metric(NamedTuple):
+    value: float
+    unit: str
+    # True — чем больше значение, тем лучше
+    higher_is_better: bool
+
+
+class Skipped(Exception):
+    """Замер невозможен в текущем окружении."""
+
+
+Benchmark = Callable[[Random, int], dict[str, Metric]]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(func: Benchmark) -> Benchmark:
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def best_rate(func: Callable[[], object], number: int, repeat: int) -> float:
+    """Наибольшее число операций в секунду среди repeat запусков func, выполняющей number операций."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return number / best
+
+
+def latency(samples: list[float], unit: str = 'мс') -> dict[str, Metric]:
+    """Процентили p50, p95, p99 задержек samples (в секундах)."""
+    points = quantiles(samples, n=100, method='inclusive')
+    return {
+        f'p{q}': Metric(points[q - 1] * 1000, unit, False)
+        for q in (50, 95, 99)
+    }
+
+
+def _kind(rnd: Random) -> model.Kind:
+    return kinds().get(rnd.choice(kinds()).name)
+
+
+@benchmark
+def creature_update(rnd: Random, repeat: int) -> dict[str, Metric]:
+    ticks = 100_000
+    kind = _kind(rnd)
+    feed = model.Feed(amount=10)
+    feeding = {rnd.randrange(ticks) for _ in range(ticks // 50)}
+
+    def run():
+        creature = model.Creature(kind, 'bench')
+        for tick in range(ticks):
+            creature.update()
+            if tick in feeding:
+                feed.action(creature)
+
+    return {'ticks_per_second': Metric(best_rate(run, ticks, repeat), 'тактов/с', True)}
+
+
+@benchmark
+def creature_init(rnd: Random, repeat: int) -> dict[str, Metric]:
+    number = 50_000
+    kind = _kind(rnd)
+    return {
+        'creatures_per_second': Metric(
+            best_rate(lambda: [model.Creature(kind, 'bench') for _ in range(number)], number, repeat),
+            'существ/с', True
+        )
+    }
+
+
+@benchmark
+def creature_autosave(rnd: Random, repeat: int) -> dict[str, Metric]:
+    number = 100_000
+    kind = _kind(rnd)
+
+    def run():
+        creature = model.Creature(kind, 'bench')
+        for _ in range(number):
+            creature.autosave()
+
+    return {'records_per_second': Metric(best_rate(run, number, repeat), 'записей/с', True)}
+
+
+@benchmark
+def history_get_param_history(rnd: Random, repeat: int) -> dict[str, Metric]:
+    creature = model.Creature(_kind(rnd), 'bench')
+    for _ in range(10_000):
+        creature.update()
+        creature.autosave()
+    history = creature.history
+    number = 100_000
+
+    def run():
+        for _ in range(number):
+            history.get_param_history('Satiety')
+
+    return {'calls_per_second': Metric(best_rate(run, number, repeat), 'вызовов/с', True)}
+
+
+@benchmark
+def history_growth(rnd: Random, repeat: int) -> dict[str, Metric]:
+    """Рост истории на 10^6 состояний без ограничения и с политикой Retention по умолчанию."""
+    records = 1_000_000
+    values = [{'Health': rnd.uniform(0, 50), 'Satiety': rnd.uniform(0, 30)} for _ in range(1000)]
+    result = {}
+    for label, retention in (('unbounded', None), ('retention', model.Retention())):
+        history = model.History(retention=retention)
+        start = perf_counter()
+        for age in range(records):
+            history.record(age, values[age % 1000])
+        elapsed = perf_counter() - start
+        result[f'{label}_bytes'] = Metric(history.nbytes, 'байт', False)
+        result[f'{label}_records_per_second'] = Metric(records / elapsed, 'записей/с', True)
+    return result
+
+
+@benchmark
+def pool_update(rnd: Random, repeat: int) -> dict[str, Metric]:
+    creatures, ticks = 50_000, 20
+    population = [_kind(rnd) for _ in range(creatures)]
+
+    def run():
+        pool = model.CreaturePool()
+        for i, kind in enumerate(population):
+            pool.add(model.Creature(kind, f'#{i}'))
+        start = perf_counter()
+        pool.update(ticks)
+        return perf_counter() - start
+
+    best = min(run() for _ in range(repeat))
+    return {'creature_ticks_per_second': Metric(creatures * ticks / best, 'тактов существ/с', True)}
+
+
+@benchmark
+def evolve_offline(rnd: Random, repeat: int) -> dict[str, Metric]:
+    from evolution import evolve
+
+    number = 10_000
+    population = [(_kind(rnd), rnd.randrange(60 * model.Creature.ticks_per_day)) for _ in range(number)]
+
+    def run():
+        for kind, ticks in population:
+            evolve(model.Creature(kind, 'bench'), ticks)
+
+    return {'creatures_per_second': Metric(best_rate(run, number, repeat), 'существ/с', True)}
+
+
+@benchmark
+def journal_save_load(rnd: Random, repeat: int) -> dict[str, Metric]:
+    """Задержки LoadCreature.save и LoadCreature.load с журналом сохранений по умолчанию."""
+    saves, loads = 2000, 100
+    default_path = LoadCreature.default_path
+    with TemporaryDirectory() as directory:
+        LoadCreature.default_path = Path(directory) / 'creature.save'
+        try:
+            creature = model.Creature(_kind(rnd), 'bench')
+            save_times = []
+            for _ in range(saves):
+                for _ in range(rnd.randint(1, model.Creature.ticks_per_day)):
+                    creature.update()
+                creature.autosave()
+                start = perf_counter()
+                LoadCreature.save(creature)
+                save_times.append(perf_counter() - start)
+            load_times = []
+            for _ in range(loads):
+                start = perf_counter()
+                LoadCreature.load()
+                load_times.append(perf_counter() - start)
+        finally:
+            LoadCreature.storage().close()
+            LoadCreature.default_path = default_path
+    return (
+        {f'save_{name}': metric for name, metric in latency(save_times).items()}
+        | {f'load_{name}': metric for name, metric in latency(load_times).items()}
+    )
+
+
+@benchmark
+def sqlite_save_load(rnd: Random, repeat: int) -> dict[str, Metric]:
+    """Задержки сохранения и загрузки одного существа в базе SQLite с 1000 существ."""
+    from storage import SQLiteStorage
+
+    creatures, rounds = 1000, 5
+    with TemporaryDirectory() as directory:
+        storage = SQLiteStorage(Path(directory) / 'bench.db')
+        try:
+            population = [model.Creature(_kind(rnd), f'#{i}') for i in range(creatures)]
+            storage.save_many(population)
+            save_times, load_times = [], []
+            for _ in range(rounds):
+                for creature in population:
+                    creature.update()
+                    creature.autosave()
+                    start = perf_counter()
+                    storage.save(creature)
+                    save_times.append(perf_counter() - start)
+            for creature in rnd.sample(population, 500):
+                start = perf_counter()
+                storage.load(creature.id)
+                load_times.append(perf_counter() - start)
+        finally:
+            storage.close()
+    return (
+        {f'save_{name}': metric for name, metric in latency(save_times).items()}
+        | {f'load_{name}': metric for name, metric in latency(load_times).items()}
+    )
+
+
+@benchmark
+def view_resize_image(rnd: Random, repeat: int) -> dict[str, Metric]:
+    """Масштабирование изображения кота до 400 × 400; без дисплея пропускается (можно запустить под Xvfb)."""
+    try:
+        from tkinter import PhotoImage, TclError, Tk
+    except ImportError as exc:
+        raise Skipped(f'нет tkinter ({exc})')
+    try:
+        root = Tk()
+    except TclError as exc:
+        raise Skipped(f'нет дисплея ({exc})')
+    from images import resize_image
+
+    root.withdraw()
+    try:
+        image = PhotoImage(file=ROOT_DIR / 'data/images/cat.png')
+        width, height = image.width(), image.height()
+        size = 400
+        return {
+            f'{method}_pixels_per_second': Metric(
+                best_rate(lambda: resize_image(image, width, height, size, size, method), size * size, repeat),
+                'пикселей/с', True
+            )
+            for method in ('nearest', 'bilinear')
+        }
+    finally:
+        root.destroy()
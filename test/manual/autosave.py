@@ -0,0 +1,146 @@
+"""
+Фоновое сохранение существ с объединением записей.
+
+Владелец существа только отмечает его изменённым (AutosaveService.mark) — это не обращается к диску.
+Отметки, сделанные за окно window секунд после первой из них, объединяются: поток сервиса копирует отмеченных существ и записывает копии всех существ одним вызовом Storage.save_many (для SQLiteStorage — одной транзакцией).
+Таким образом такты не ждут диска, а при сбое теряется не больше одного окна изменений.
+
+Под замком lock копируются только параметры и ссылки на массивы истории (History.frozen), вне зависимости от её длины; потоки, изменяющие отмеченных существ, должны держать lock на время изменений, чтобы копия была согласованной.
+Сериализация истории и запись выполняются без замка; только существа, ещё не получившие номер в хранилище, записываются под замком один раз.
+"""
+
+from collections.abc import Iterable
+from threading import Condition, Lock, Thread
+from time import monotonic, time
+
+import model
+from storage import Storage
+
+
+class AutosaveService(Thread):
+    """Поток, сохраняющий отмеченных существ в хранилище storage не позже чем через window секунд."""
+    def __init__(self, storage: Storage, window: float = 1.0):
+        super().__init__(name='autosave', daemon=True)
+        self.storage = storage
+        self.window = window
+        # держится владельцами существ на время изменений и сервисом на время копирования
+        self.lock = Lock()
+        self.flushes = 0
+        self.saved = 0
+        self.error: BaseException | None = None
+        self._condition = Condition()
+        # по id объекта: у несохранённых существ ещё нет Creature.id
+        self._dirty: dict[int, model.Creature] = {}
+        self._deadline: float | None = None
+        # номера запрошенной и выполненной записи для flush
+        self._requested = 0
+        self._done = 0
+        self._stopping = False
+
+    def mark(self, creature: model.Creature) -> None:
+        """Отмечает существо изменённым."""
+        with self._condition:
+            self._dirty[id(creature)] = creature
+            if self._deadline is None:
+                self._deadline = monotonic() + self.window
+                self._condition.notify()
+
+    def mark_many(self, creatures: Iterable[model.Creature]) -> None:
+        with self._condition:
+            for creature in creatures:
+                self._dirty[id(creature)] = creature
+            if self._deadline is None and self._dirty:
+                self._deadline = monotonic() + self.window
+                self._condition.notify()
+
+    def flush(self, timeout: float = None) -> None:
+        """Немедленно записывает всех отмеченных существ и дожидается окончания записи; не вызывается под lock."""
+        with self._condition:
+            if not self.is_alive():
+                self._write(self._take())
+                return
+            self._requested += 1
+            target = self._requested
+            self._condition.notify()
+            if not self._condition.wait_for(lambda: self._done >= target, timeout):
+                raise TimeoutError('запись не завершилась за отведённое время')
+        self._raise()
+
+    def close(self, timeout: float = None) -> None:
+        """Записывает отмеченных существ и останавливает поток."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self.is_alive():
+            self.join(timeout)
+        else:
+            self._write(self._take())
+        self._raise()
+
+    def run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopping and self._requested == self._done and (
+                        self._deadline is None or self._deadline > monotonic()):
+                    self._condition.wait(None if self._deadline is None else self._deadline - monotonic())
+                batch = self._take()
+                target, stopping = self._requested, self._stopping
+            try:
+                self._write(batch)
+            except BaseException as exception:
+                self.error = exception
+                # существа остаются отмеченными до следующей попытки
+                self.mark_many(batch)
+            with self._condition:
+                self._done = target
+                self._condition.notify_all()
+            if stopping:
+                return
+
+    def _take(self) -> list[model.Creature]:
+        batch = list(self._dirty.values())
+        self._dirty.clear()
+        self._deadline = None
+        return batch
+
+    def _write(self, creatures: list[model.Creature]) -> None:
+        if not creatures:
+            return
+        timestamp = time()
+        with self.lock:
+            copies = [_detach(creature) for creature in creatures]
+            new = [
+                (creature, copy)
+                for creature, copy in zip(creatures, copies)
+                if copy.id is None
+            ] if self.storage.multiple else []
+            if new:
+                # номер назначается под замком, под которым владелец записывает действия игрока (LoadCreature.log_action):
+                # иначе то же существо было бы сохранено ещё раз под другим номером
+                self.storage.save_many([copy for _, copy in new], timestamp)
+                for creature, copy in new:
+                    creature.id = copy.id
+        saved = {id(copy) for _, copy in new}
+        self.storage.save_many([copy for copy in copies if id(copy) not in saved], timestamp)
+        self.flushes += 1
+        self.saved += len(copies)
+        self.error = None
+
+    def _raise(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+
+def _detach(creature: model.Creature) -> model.Creature:
+    """Копия существа вне пула и планировщика; история не копируется, а замораживается (History.frozen)."""
+    copy = model.Creature(creature.kind, creature.name)
+    copy.id = creature.id
+    copy.ticks = creature.ticks
+    copy.mature = creature.mature
+    options = creature.kind[creature.mature]
+    copy.params = {
+        cls: options.params[cls].instance(copy, param.value)
+        for cls, param in creature.params.items()
+    }
+    copy.history = creature.history.frozen()
+    return copy
@@ -0,0 +1,144 @@
+"""
+Пересчёт параметров множества сохранённых существ при запуске (ТЗ п.3в, 4д).
+
+Сохранённые существа делятся на пачки, каждая пачка пересчитывается в отдельном процессе.
+Готовые существа выдаются по мере завершения пачек, поэтому первые из них доступны задолго до окончания пересчёта всех.
+При jobs=0 пересчёт выполняется в текущем процессе в исходном порядке — это детерминированный вариант для проверок.
+"""
+
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
+from os import cpu_count
+from time import perf_counter, time
+
+import model
+from evolution import evolve_recorded
+from journal import SavedCreature
+
+
+# вид, такты, стадия, значения параметров, такты для пересчёта
+Payload = tuple[str, int, int, dict[str, float], int]
+# такты, стадия, значения параметров, записанное на границе ИД состояние истории (возраст, значения) или None
+Result = tuple[int, int, dict[str, float], tuple[int, dict[str, float]] | None]
+
+
+class Throughput:
+    """Счётчики пересчёта: число существ и тактов, затраченное время."""
+    def __init__(self):
+        self.creatures = 0
+        self.ticks = 0
+        self.seconds = 0.0
+
+    def __str__(self):
+        return (
+            f'{self.creatures} существ, {self.ticks} тактов за {self.seconds:.3f} с: '
+            f'{self.creatures_per_second:,.0f} существ/с, {self.ticks_per_second:,.0f} тактов/с'
+        )
+
+    @property
+    def creatures_per_second(self) -> float:
+        return self.creatures / self.seconds if self.seconds else 0.0
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.seconds if self.seconds else 0.0
+
+
+def catch_up(
+        saved: Iterable[SavedCreature],
+        restore: Callable[[SavedCreature], model.Creature],
+        hours_per_day: float,
+        now: float = None,
+        jobs: int = None,
+        chunk_size: int = 256,
+        throughput: Throughput = None,
+) -> Iterator[model.Creature]:
+    """
+    Восстанавливает и пересчитывает сохранённые существа, выдавая их по мере готовности.
+
+    restore создаёт существо по сохранённому состоянию; hours_per_day — число часов реального времени в 1 ИД (ТЗ п.3в).
+    jobs — число процессов (по умолчанию — число ядер), 0 — пересчёт в текущем процессе.
+    """
+    now = time() if now is None else now
+    jobs = (cpu_count() or 1) if jobs is None else jobs
+    throughput = Throughput() if throughput is None else throughput
+    start = perf_counter()
+    chunks = _chunks(saved, chunk_size)
+
+    def finish(chunk: list[SavedCreature], results: list[Result]) -> list[model.Creature]:
+        creatures = []
+        for state, (ticks, maturity, params, recorded) in zip(chunk, results):
+            throughput.ticks += ticks - state.ticks
+            state.ticks, state.maturity, state.params = ticks, maturity, params
+            creature = restore(state)
+            if recorded is not None:
+                creature.history.record(*recorded)
+            creatures.append(creature)
+        throughput.creatures += len(creatures)
+        throughput.seconds = perf_counter() - start
+        return creatures
+
+    if not jobs:
+        for chunk in chunks:
+            yield from finish(chunk, evolve_chunk(_payload(chunk, now, hours_per_day)))
+        return
+    # пул процессов нужен не при каждом запуске, а импорт concurrent.futures.process заметен при старте
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+    with ProcessPoolExecutor(jobs) as executor:
+        # пачки отправляются постепенно, чтобы первые результаты не ждали чтения всех сохранений
+        pending = {}
+        for chunk in chunks:
+            pending[executor.submit(evolve_chunk, _payload(chunk, now, hours_per_day))] = chunk
+            if len(pending) >= 2 * jobs:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from finish(pending.pop(future), future.result())
+        for future in as_completed(pending):
+            yield from finish(pending[future], future.result())
+
+
+def evolve_chunk(chunk: list[Payload]) -> list[Result]:
+    """Пересчитывает пачку существ; выполняется в процессе-исполнителе."""
+    # импорт здесь: controller сам импортирует этот модуль
+    from controller import kinds
+
+    results = []
+    for kind, ticks, maturity, params, elapsed in chunk:
+        creature = model.Creature(kinds().get(kind), '')
+        creature.ticks = ticks
+        mature = model.Maturity(maturity)
+        if mature is not creature.mature:
+            creature._grow_up(mature)
+        for cls, param in creature.params.items():
+            param.value = params[cls.__name__]
+        recorded = None
+        if evolve_recorded(creature, elapsed):
+            state = creature.history[-1]
+            recorded = (state.age, dict(state.values))
+        results.append((
+            creature.ticks,
+            creature.mature.value,
+            {cls.__name__: param.value for cls, param in creature.params.items()},
+            recorded,
+        ))
+    return results
+
+
+def _payload(chunk: list[SavedCreature], now: float, hours_per_day: float) -> list[Payload]:
+    return [
+        (
+            state.kind,
+            state.ticks,
+            state.maturity,
+            dict(state.params),
+            int(max((now - state.timestamp) / 3600, 0) / hours_per_day * model.Creature.ticks_per_day),
+        )
+        for state in chunk
+    ]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
@@ -0,0 +1,85 @@
+"""
+Игровые часы во время работы приложения (ТЗ п.3б, 4г).
+
+Такты отсчитываются от момента запуска часов: номер такта, который должен быть выполнен к моменту now, вычисляется из прошедшего реального времени, а не накоплением интервалов.
+Поэтому время не уплывает ни от нагрузки на интерфейс, ни от погрешности суммирования, а отставание после задержек навёрстывается пачками тактов.
+"""
+
+from fractions import Fraction as frac
+from math import floor
+from time import monotonic
+from typing import Callable
+
+
+class GameClock:
+    """
+    Часы с постоянным шагом: ticks_per_day тактов за 1 ИД, 1 ИД — real_minutes_per_day минут реального времени.
+
+    advance() возвращает число тактов, которые нужно выполнить к текущему моменту, но не больше max_batch — остаток возвращается следующими вызовами.
+    """
+    def __init__(
+            self,
+            ticks_per_day: int,
+            real_minutes_per_day: float | frac,
+            max_batch: int = 1000,
+            timer: Callable[[], float] = monotonic,
+    ):
+        if ticks_per_day <= 0 or real_minutes_per_day <= 0:
+            raise ValueError('ticks_per_day and real_minutes_per_day must be positive')
+        self.ticks_per_day = ticks_per_day
+        self.real_minutes_per_day = real_minutes_per_day
+        self.max_batch = max_batch
+        self.timer = timer
+        self.ticks = 0
+        self._start: float | None = None
+        self._paused_at: float | None = None
+
+    @property
+    def tick_seconds(self) -> float:
+        """Длительность одного такта в секундах реального времени."""
+        return self.real_minutes_per_day * 60 / self.ticks_per_day
+
+    @property
+    def running(self) -> bool:
+        return self._start is not None and self._paused_at is None
+
+    def start(self) -> None:
+        if self._start is None:
+            self._start = self.timer() - self.ticks * self.tick_seconds
+
+    def pause(self) -> None:
+        if self.running:
+            self._paused_at = self.timer()
+
+    def resume(self) -> None:
+        """Продолжает отсчёт; время паузы тактами не навёрстывается."""
+        if self._paused_at is not None:
+            self._start += self.timer() - self._paused_at
+            self._paused_at = None
+
+    def due(self, now: float = None) -> int:
+        """Число тактов, отставание на которые накоплено к моменту now."""
+        return max(floor(self.elapsed(now) / self.tick_seconds) - self.ticks, 0)
+
+    def advance(self, now: float = None) -> int:
+        """Отмечает очередную пачку тактов выполненной и возвращает её размер."""
+        ticks = min(self.due(now), self.max_batch)
+        self.ticks += ticks
+        return ticks
+
+    def elapsed(self, now: float = None) -> float:
+        """Секунды реального времени, прошедшие по часам с запуска (без пауз); по ним идут анимации."""
+        if self._start is None:
+            return 0.0
+        if self._paused_at is not None:
+            now = self._paused_at
+        elif now is None:
+            now = self.timer()
+        return now - self._start
+
+    def until_next(self, now: float = None) -> float:
+        """Секунды реального времени до следующего такта."""
+        if not self.running:
+            return self.tick_seconds
+        now = self.timer() if now is None else now
+        return max((self._start + (self.ticks + 1) * self.tick_seconds) - now, 0.0)
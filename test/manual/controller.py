@@ -1,51 +1,158 @@
+import marshal
+from collections.abc import Iterable, Iterator
 from datetime import datetime as dt
 from fractions import Fraction as frac
-from json import dumps as jdumps, loads as jloads
+from json import loads as jloads
 from pathlib import Path
-from sys import path
 
 import model
+from autosave import AutosaveService
+from catchup import Throughput, catch_up
+from clock import GameClock
+from evolution import evolve_recorded
+from journal import Event, SavedCreature
+from storage import JournalStorage, Storage
 
 
-ROOT_DIR = Path(path[0]).parent.parent
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 
 
 class App:
+    # 1 ИД к минутам реального времени во время работы приложения (ТЗ п.3б)
+    real_minutes_per_game_day: frac = frac(2, 5)
+
     def __init__(self):
         self.creature: model.Creature = LoadCreature.load() if self._is_live() else MainMenu.start()
 
+    @classmethod
+    def clock(cls) -> GameClock:
+        """Часы, по которым обновляются параметры существа во время работы приложения (ТЗ п.4г)."""
+        return GameClock(model.Creature.ticks_per_day, cls.real_minutes_per_game_day)
+
     @staticmethod
     def _is_live() -> bool:
-        return LoadCreature.default_path.is_file()
+        return LoadCreature.storage().exists()
 
 
 class LoadCreature:
     default_path: str | Path = ROOT_DIR / 'data/creature.save'
-    game_days_to_real_hours: frac = frac(1, 2)
+    # 1 ИД к часам реального времени при пересчёте после загрузки (ТЗ п.3в)
+    real_hours_per_game_day: frac = frac(2)
+    checkpoint_every: int = 1000
+    # хранилище сохранений; если не задано — журнал в default_path
+    backend: Storage = None
+    _default_backend: JournalStorage = None
+    # окно объединения фоновых сохранений, с
+    autosave_window: float = 1.0
+    _autosave: AutosaveService = None
+
+    @classmethod
+    def storage(cls) -> Storage:
+        if cls.backend is not None:
+            return cls.backend
+        default = cls._default_backend
+        if default is None or default.path != Path(cls.default_path):
+            if default is not None:
+                default.close()
+            cls._default_backend = JournalStorage(cls.default_path, cls.checkpoint_every)
+        return cls._default_backend
 
     @classmethod
     def save(cls, creature: model.Creature):
-        data = {
-            'timestamp': dt.now().timestamp(),
-            'kind': creature.kind.name,
-            'name': creature.name,
-            'age': creature.age,
-            'maturity': creature.mature.value,
-            'params': creature.history[-1].__dict__
-        }
-        data = jdumps(data, ensure_ascii=False)
-        cls.default_path.write_text(data, encoding='utf-8')
+        cls.storage().save(creature, dt.now().timestamp())
 
     @classmethod
-    def load(cls) -> model.Creature:
-        pass
+    def autosave(cls) -> AutosaveService:
+        """Запущенный сервис фонового сохранения в текущее хранилище."""
+        service = cls._autosave
+        if service is None or service.storage is not cls.storage() or not service.is_alive():
+            if service is not None:
+                service.close()
+            service = cls._autosave = AutosaveService(cls.storage(), cls.autosave_window)
+            service.start()
+        return service
 
     @classmethod
-    def __params_evolution(cls, saved_state: model.State, hours: float) -> model.State:
+    def log_action(cls, creature: model.Creature, action: model.Action):
+        """Записывает в хранилище действие игрока."""
+        cls.storage().log_event(creature, action.__class__.__name__, dt.now().timestamp())
+
+    @classmethod
+    def load(cls, creature_id: int = None, real_hours_per_game_day: frac = None) -> model.Creature:
+        """
+        Загружает существо и пересчитывает его параметры за время с последнего сохранения.
+
+        real_hours_per_game_day — масштаб времени пересчёта, по умолчанию — масштаб при закрытом приложении.
+        """
+        saved = cls.storage().load(creature_id)
+        creature = cls.restore(saved)
+        hours = (dt.now().timestamp() - saved.timestamp) / 3600
+        cls.__params_evolution(creature, hours, real_hours_per_game_day)
+        return creature
+
+    @classmethod
+    def events(cls, creature: model.Creature) -> list[Event]:
+        """Сохранённые действия игрока и активности существа; для несохранённого существа — пустой список."""
+        storage = cls.storage()
+        if not storage.exists(creature.id):
+            return []
+        saved = storage.load(creature.id)
+        if (saved.kind, saved.name) != (creature.kind.name, creature.name) or saved.ticks > creature.ticks:
+            return []
+        return saved.events
+
+    @classmethod
+    def load_many(
+            cls,
+            creature_ids: Iterable[int],
+            jobs: int = None,
+            chunk_size: int = 256,
+            throughput: Throughput = None,
+    ) -> Iterator[model.Creature]:
+        """
+        Загружает и пересчитывает множество существ в пуле процессов, выдавая их по мере готовности (см. catchup).
+
+        При jobs=0 пересчёт выполняется последовательно в текущем процессе.
+        """
+        storage = cls.storage()
+        yield from catch_up(
+            (storage.load(creature_id) for creature_id in creature_ids),
+            cls.restore,
+            cls.real_hours_per_game_day,
+            dt.now().timestamp(),
+            jobs,
+            chunk_size,
+            throughput,
+        )
+
+    @staticmethod
+    def restore(saved: SavedCreature) -> model.Creature:
+        """Создаёт существо по сохранённому состоянию без пересчёта параметров."""
+        kind = kinds().get(saved.kind)
+        creature = model.Creature(kind, saved.name)
+        creature.id = saved.id
+        creature.ticks = saved.ticks
+        mature = model.Maturity(saved.maturity)
+        if mature is not creature.mature:
+            creature._grow_up(mature)
+        for cls, param in creature.params.items():
+            param.value = saved.params[cls.__name__]
+        creature.history = saved.history
+        return creature
+
+    @classmethod
+    def __params_evolution(
+            cls,
+            creature: model.Creature,
+            hours: float,
+            real_hours_per_game_day: frac = None,
+    ) -> model.State | None:
         """Пересчитывает параметры существа в соответствии с мат.моделью имитации жизни при закрытом приложении (ТЗ п.3в)."""
-        hours*cls.game_days_to_real_hours
-        ...
-        return saved_state
+        if real_hours_per_game_day is None:
+            real_hours_per_game_day = cls.real_hours_per_game_day
+        days = max(hours, 0) / real_hours_per_game_day
+        evolve_recorded(creature, int(days * creature.ticks_per_day))
+        return creature.history[-1] if creature.history else None
 
 
 class MainMenu:
@@ -55,13 +162,216 @@ class MainMenu:
         """Запускает GUI с фреймом главного меню."""
 
     @staticmethod
-    def choose_kind(chosen_kind: model.Kind) -> model.Creature:
+    def choose_kind(chosen_kind: 'KindEntry', name: str = '') -> model.Creature:
         """Создаёт питомца на основе выбранного пользователем вида."""
+        return model.Creature(chosen_kind.kind, name)
+
+
+class KindEntry:
+    """
+    Вид в каталоге LoadKinds.
+
+    Для главного меню достаточно имени и изображения; объект model.Kind создаётся из проверенного описания только при первом обращении к свойству kind.
+    """
+    __slots__ = ('name', 'image', '_spec', '_kind')
+
+    def __init__(self, name: str, image: Path, spec: bytes):
+        self.name = name
+        self.image = image
+        # описание вида, сериализованное marshal
+        self._spec = spec
+        self._kind: model.Kind | None = None
+
+    def __repr__(self):
+        return f'<KindEntry {self.name}>'
+
+    @property
+    def kind(self) -> model.Kind:
+        if self._kind is None:
+            self._kind = LoadKinds.generate(marshal.loads(self._spec))
+        return self._kind
 
 
 class LoadKinds(list):
-    def __init__(self, *kinds: model.Kind):
-        super().__init__(kinds)
+    """
+    Каталог видов, описанных файлами TOML или JSON в каталоге default_path.
+
+    Файлы проверяются один раз; проверенные описания сохраняются в cache_path вместе с временем изменения и размером исходных файлов.
+    При следующих запусках заново читаются только изменённые файлы, а объекты model.Kind создаются лишь для выбранных видов (см. KindEntry).
+    """
+    default_path: Path = ROOT_DIR / 'data/kinds'
+    cache_path: Path = ROOT_DIR / 'data/.cache/kinds.marshal'
+    cache_version: int = 1
+
+    def __init__(self, *kinds: model.Kind, path: str | Path = None):
+        if kinds:
+            # виды, созданные в коде
+            super().__init__(KindEntry(kind.name, kind.image, b'') for kind in kinds)
+            for entry, kind in zip(self, kinds):
+                entry._kind = kind
+        else:
+            super().__init__(self._catalog(Path(self.default_path if path is None else path)))
+        self._by_name: dict[str, KindEntry] = {entry.name: entry for entry in self}
+
+    def get(self, name: str) -> model.Kind:
+        """Вид с именем name; создаётся при первом обращении."""
+        return self._by_name[name].kind
+
+    @classmethod
+    def read_file(cls, file: Path) -> dict:
+        """Читает и проверяет описание вида; пути к изображениям указываются относительно файла."""
+        with open(file, 'rb') as stream:
+            if file.suffix == '.toml':
+                import tomllib
+                data = tomllib.load(stream)
+            else:
+                data = jloads(stream.read().decode('utf-8'))
+        try:
+            return cls._validate(data, file.parent)
+        except (KeyError, TypeError, ValueError) as exception:
+            raise ValueError(f'{file}: {exception!r}') from exception
+
+    @staticmethod
+    def generate(spec: dict) -> model.Kind:
+        """Создаёт вид по проверенному описанию."""
+        params = _subclasses(model.Parameter)
+        actions = _subclasses(model.Action)
+
+        def action(data: dict) -> model.Action:
+            data = dict(data)
+            return actions[data.pop('action')](**data)
+
+        return model.Kind(
+            spec['name'],
+            spec['image'],
+            {
+                model.Maturity[stage['maturity']]: model.MatureOptions(
+                    stage['days'],
+                    *(params[name](*values) for name, values in stage['params'].items()),
+                    player_actions=[action(data) for data in stage['player_actions']],
+                    creature_actions={action(data) for data in stage['creature_actions']},
+                )
+                for stage in spec['stages']
+            },
+            spec['animations'],
+        )
+
+    @classmethod
+    def _catalog(cls, directory: Path) -> list[KindEntry]:
+        files = sorted(
+            file
+            for file in directory.iterdir()
+            if file.suffix in ('.toml', '.json')
+        ) if directory.is_dir() else []
+        sources = {}
+        for file in files:
+            stat = file.stat()
+            sources[str(file)] = (stat.st_mtime_ns, stat.st_size)
+        try:
+            cache = marshal.loads(cls.cache_path.read_bytes())
+            if cache['version'] != cls.cache_version:
+                raise ValueError
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            cache = {'version': cls.cache_version, 'sources': {}, 'kinds': {}}
+        kinds = {}
+        changed = len(cache['sources']) != len(sources)
+        for source, stamp in sources.items():
+            entry = cache['kinds'].get(source)
+            if entry is None or cache['sources'].get(source) != stamp:
+                spec = cls.read_file(Path(source))
+                entry = (spec['name'], spec['image'], marshal.dumps(spec))
+                changed = True
+            kinds[source] = entry
+        if changed:
+            cls.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp = cls.cache_path.with_suffix('.tmp')
+            temp.write_bytes(marshal.dumps({'version': cls.cache_version, 'sources': sources, 'kinds': kinds}))
+            temp.replace(cls.cache_path)
+        entries = [KindEntry(name, Path(image), spec) for name, image, spec in kinds.values()]
+        names = [entry.name for entry in entries]
+        if len(set(names)) != len(names):
+            raise ValueError(f'duplicate kind names in {directory}')
+        return entries
+
+    @staticmethod
+    def _validate(data: dict, base: Path) -> dict:
+        """Приводит описание вида к виду, пригодному для marshal, и проверяет его."""
+        params = _subclasses(model.Parameter)
+        actions = _subclasses(model.Action)
+
+        def image(value: str) -> str:
+            return str((base / value).resolve())
+
+        def action(data: dict) -> dict:
+            data = dict(data)
+            name = data['action']
+            if name not in actions:
+                raise ValueError(f'unknown action {name!r}')
+            if 'image' in data:
+                data['image'] = image(data['image'])
+            # проверка аргументов конструктора
+            actions[name](**{key: value for key, value in data.items() if key != 'action'})
+            return data
+
+        stages = []
+        for stage in data['stages']:
+            maturity = model.Maturity[stage['maturity']].name
+            days = stage['days']
+            if not isinstance(days, int) or days <= 0:
+                raise ValueError(f'{maturity}: days must be a positive integer')
+            stage_params = {}
+            for name, values in stage['params'].items():
+                if name not in params:
+                    raise ValueError(f'unknown parameter {name!r}')
+                value, min_, max_ = values
+                if not min_ <= value <= max_:
+                    raise ValueError(f'{maturity}: {name} = {value} is out of range [{min_}, {max_}]')
+                stage_params[name] = (float(value), float(min_), float(max_))
+            stages.append({
+                'maturity': maturity,
+                'days': days,
+                'params': stage_params,
+                'player_actions': [action(item) for item in stage.get('player_actions', [])],
+                'creature_actions': [action(item) for item in stage.get('creature_actions', [])],
+            })
+        if not stages:
+            raise ValueError('no stages')
+        maturities = [stage['maturity'] for stage in stages]
+        if len(set(maturities)) != len(maturities):
+            raise ValueError('duplicate stages')
+        return {
+            'name': str(data['name']),
+            'image': image(data['image']),
+            'stages': stages,
+            'animations': {
+                name: [image(frame) for frame in frames]
+                for name, frames in data.get('animations', {}).items()
+            },
+        }
+
+
+def _subclasses(base: type) -> dict[str, type]:
+    """Неабстрактные подклассы base по именам классов."""
+    result, stack = {}, [base]
+    while stack:
+        cls = stack.pop()
+        for sub in cls.__subclasses__():
+            stack.append(sub)
+            if not getattr(sub, '__abstractmethods__', None):
+                result[sub.__name__] = sub
+    return result
+
+
+def kinds() -> LoadKinds:
+    """Каталог видов из LoadKinds.default_path; читается при первом обращении."""
+    catalog = globals().get('loaded_kinds')
+    if catalog is None:
+        catalog = globals()['loaded_kinds'] = LoadKinds()
+    return catalog
 
 
-loaded_kinds = LoadKinds(model.cat_kind, model.dog_kind, model.mouse_kind)
+def __getattr__(name: str):
+    # controller.loaded_kinds создаётся при первом обращении
+    if name == 'loaded_kinds':
+        return kinds()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
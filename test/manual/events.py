@@ -0,0 +1,157 @@
+"""
+Журнал событий существа: действия игрока и активности с номерами тактов.
+
+Между событиями параметры меняются только тактами, поэтому состояние в любой момент восстанавливается из ближайшего предшествующего снимка: события после снимка применяются по очереди, а промежутки между ними пересчитываются по формулам (evolution.evolve).
+Снимок состояния записывается после каждых snapshot_every событий и при каждой записи в историю (record), так что запрос стоит O(snapshot_every) вне зависимости от возраста существа, и историю можно вести реже.
+Журнал загруженного существа начинается с состояний его истории и сохранённых событий (EventLog.restore).
+
+Хранится не больше 2·keep_snapshots снимков и события после самого раннего из них: память журнала ограничена, а запросы возможны начиная с такта самого раннего снимка.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from time import time
+from typing import NamedTuple
+
+import model
+from evolution import evolve
+from journal import Event
+
+
+class EventSnapshot(NamedTuple):
+    """Состояние существа после первых events событий журнала (с начала жизни существа)."""
+    ticks: int
+    events: int
+    maturity: int
+    params: dict[str, float]
+
+
+class EventLog:
+    """Журнал событий одного существа вида kind."""
+    def __init__(self, kind: model.Kind, snapshot_every: int = 100, keep_snapshots: int = 64):
+        self.kind = kind
+        self.snapshot_every = snapshot_every
+        self.keep_snapshots = keep_snapshots
+        self.events: list[Event] = []
+        self.snapshots: list[EventSnapshot] = []
+        # число отброшенных событий: EventSnapshot.events - dropped — индекс в events
+        self.dropped = 0
+
+    def __len__(self):
+        return self.dropped + len(self.events)
+
+    @classmethod
+    def restore(
+            cls,
+            creature: model.Creature,
+            events: Iterable[Event],
+            snapshot_every: int = 100,
+            keep_snapshots: int = 64,
+    ) -> 'EventLog':
+        """
+        Журнал загруженного существа: снимки — состояния его истории, события — сохранённые события.
+
+        Состояние истории с возрастом age соответствует концу такта age·ticks_per_day, до событий этого такта.
+        """
+        log = cls(creature.kind, snapshot_every, keep_snapshots)
+        events = sorted(events, key=lambda event: event.ticks)
+        ticks = [event.ticks for event in events]
+        names = {param.__name__ for param in creature.params}
+        history = creature.history
+        for state in history[max(len(history) - keep_snapshots, 0):]:
+            state_ticks = state.age * creature.ticks_per_day
+            if state_ticks > creature.ticks or not names <= state.values.keys():
+                continue
+            if log.snapshots and state_ticks <= log.snapshots[-1].ticks:
+                continue
+            log.snapshots.append(EventSnapshot(
+                ticks=state_ticks,
+                events=bisect_left(ticks, state_ticks),
+                maturity=creature.kind.mature_at(state.age).value,
+                params=dict(state.values),
+            ))
+        # события до самого раннего снимка для запросов не нужны
+        first = log.snapshots[0].events if log.snapshots else len(events)
+        log.dropped = first
+        log.events = events[first:]
+        log.start(creature)
+        return log
+
+    def start(self, creature: model.Creature) -> None:
+        """Записывает снимок, с которого начинается журнал или продолжается после загрузки."""
+        self.snapshots.append(self._snapshot(creature))
+
+    def record(self, creature: model.Creature) -> None:
+        """Записывает снимок текущего состояния, например вместе с записью в историю."""
+        if not self.snapshots:
+            self.start(creature)
+        elif self.snapshots[-1].ticks != creature.ticks or self.snapshots[-1].events != len(self):
+            self.snapshots.append(self._snapshot(creature))
+            self._trim()
+
+    def apply(self, creature: model.Creature, action: model.Action, timestamp: float = None) -> str | None:
+        """Выполняет действие или активность и записывает его в журнал."""
+        if not self.snapshots:
+            self.start(creature)
+        if self.events and creature.ticks < self.events[-1].ticks:
+            raise ValueError('события записываются в порядке тактов')
+        message = action.action(creature)
+        self.events.append(Event(creature.ticks, time() if timestamp is None else timestamp, action.__class__.__name__))
+        if not len(self) % self.snapshot_every:
+            self.snapshots.append(self._snapshot(creature))
+            self._trim()
+        return message
+
+    def state_at(self, ticks: int) -> model.Creature:
+        """
+        Восстанавливает существо на момент ticks: после всех событий с номером такта не больше ticks.
+
+        Возвращается новый объект Creature, не связанный с исходным.
+        """
+        if not self.snapshots or ticks < self.snapshots[0].ticks:
+            raise ValueError(f'журнал начинается с такта {self.snapshots[0].ticks if self.snapshots else None}')
+        # последний снимок, сделанный не позже ticks
+        index = bisect_right(self.snapshots, ticks, key=lambda snapshot: snapshot.ticks) - 1
+        snapshot = self.snapshots[index]
+        creature = self._restore(snapshot)
+        for event in self.events[snapshot.events - self.dropped:]:
+            if event.ticks > ticks:
+                break
+            evolve(creature, event.ticks - creature.ticks)
+            self._action(creature, event.action).action(creature)
+        evolve(creature, ticks - creature.ticks)
+        return creature
+
+    def _trim(self) -> None:
+        """Оставляет keep_snapshots последних снимков, когда их накопилось вдвое больше, и события после них."""
+        if len(self.snapshots) <= 2 * self.keep_snapshots:
+            return
+        del self.snapshots[:-self.keep_snapshots]
+        first = self.snapshots[0].events
+        del self.events[:first - self.dropped]
+        self.dropped = first
+
+    def _action(self, creature: model.Creature, name: str) -> model.Action:
+        """Экземпляр действия с именем класса name на текущей стадии существа."""
+        for action in (*creature.player_actions, *creature.creature_actions):
+            if action.__class__.__name__ == name:
+                return action
+        raise LookupError(f'{name} недоступно на стадии {creature.mature.name}')
+
+    def _snapshot(self, creature: model.Creature) -> EventSnapshot:
+        return EventSnapshot(
+            ticks=creature.ticks,
+            events=len(self),
+            maturity=creature.mature.value,
+            params={cls.__name__: param.value for cls, param in creature.params.items()},
+        )
+
+    def _restore(self, snapshot: EventSnapshot) -> model.Creature:
+        creature = model.Creature(self.kind, '')
+        creature.ticks = snapshot.ticks
+        mature = model.Maturity(snapshot.maturity)
+        if mature is not creature.mature:
+            creature._grow_up(mature)
+        for cls, param in creature.params.items():
+            param.value = snapshot.params[cls.__name__]
+        return creature
@@ -0,0 +1,121 @@
+"""
+Пересчёт параметров существа за период, прошедший без обновлений (ТЗ п.3в, 4д).
+
+Вместо покадрового повторения Creature.update состояние после N тактов вычисляется по формулам, поэтому время пересчёта не зависит от N.
+Интервал разбивается на отрезки между сменами стадий взросления, на каждом из которых диапазоны параметров постоянны.
+"""
+
+from math import floor
+
+from model import Creature, Health, Kind, Maturity, Satiety
+
+
+def evolve(creature: Creature, ticks: int) -> None:
+    """Продвигает существо на ticks тактов вперёд."""
+    if not supports_closed_form(creature.kind):
+        for _ in range(ticks):
+            creature.update()
+        return
+    health, satiety = creature.params[Health], creature.params[Satiety]
+    end = creature.ticks + ticks
+    while creature.ticks < end:
+        stage_end = creature.kind.stage_end(creature.mature)
+        boundary = end if stage_end is None else min(end, stage_end * creature.ticks_per_day)
+        health.value, satiety.value = _segment(
+            creature.kind,
+            creature.mature,
+            health.value,
+            satiety.value,
+            boundary - creature.ticks,
+        )
+        creature.ticks = boundary
+        if not creature.ticks % creature.ticks_per_day:
+            new_mature = creature.kind.mature_at(creature.age)
+            if new_mature is not creature.mature:
+                creature._grow_up(new_mature)
+
+
+def evolve_recorded(creature: Creature, ticks: int) -> bool:
+    """
+    Продвигает существо на ticks тактов и записывает в историю состояние на последней границе ИД внутри промежутка.
+
+    Как и при обычной работе, состояния истории записываются только на границах ИД: по ним журнал событий восстанавливает снимки (events.EventLog.restore).
+    Возвращает True, если состояние записано.
+    """
+    end = creature.ticks + ticks
+    day_end = end - end % creature.ticks_per_day
+    if day_end <= creature.ticks:
+        evolve(creature, ticks)
+        return False
+    evolve(creature, day_end - creature.ticks)
+    creature.autosave()
+    evolve(creature, end - creature.ticks)
+    return True
+
+
+def supports_closed_form(kind: Kind) -> bool:
+    """Проверяет, что на всех стадиях у вида только параметры с известной мат.моделью."""
+    return all(
+        set(options.params) == {Health, Satiety}
+        for options in kind.values()
+    )
+
+
+def _segment(
+        kind: Kind,
+        mature: Maturity,
+        health: float,
+        satiety: float,
+        ticks: int
+) -> tuple[float, float]:
+    """Значения здоровья и сытости через ticks тактов при неизменных диапазонах."""
+    if ticks <= 0:
+        return health, satiety
+    health_min = kind[mature].params[Health].min
+    satiety_min = kind[mature].params[Satiety].min
+    critical = sum(kind[mature].params[Satiety].range) / 4
+    # номер первого такта, в начале которого сытость ниже критической (см. Health.update)
+    if satiety < critical:
+        crossing = 0
+    elif satiety_min < critical:
+        crossing = floor(satiety - critical) + 1
+    else:
+        crossing = ticks
+    hungry_ticks = max(0, ticks - crossing)
+    return (
+        max(health_min, health - 0.5 * hungry_ticks),
+        max(satiety_min, satiety - ticks),
+    )
+
+
+if __name__ == '__main__':
+    # сверка с покадровым пересчётом
+    from math import isclose
+    from random import Random
+
+    from controller import loaded_kinds
+    from model import Feed
+
+    rnd = Random(3)
+    for kind in (entry.kind for entry in loaded_kinds):
+        for _ in range(200):
+            replayed, computed = Creature(kind, 'a'), Creature(kind, 'b')
+            start = rnd.randrange(60 * Creature.ticks_per_day)
+            for _ in range(start):
+                replayed.update()
+            evolve(computed, start)
+            feed = rnd.randrange(40)
+            for creature in (replayed, computed):
+                Feed(amount=feed).action(creature)
+            ticks = rnd.randrange(50 * Creature.ticks_per_day)
+            for _ in range(ticks):
+                replayed.update()
+            evolve(computed, ticks)
+            assert replayed.ticks == computed.ticks
+            assert replayed.mature is computed.mature, (replayed.mature, computed.mature)
+            for cls in (Health, Satiety):
+                assert isclose(replayed.params[cls].value, computed.params[cls].value), (
+                    kind.name, cls.__name__, replayed.params[cls].value, computed.params[cls].value
+                )
+                assert replayed.params[cls].range == computed.params[cls].range
+    print('ok')
@@ -0,0 +1,146 @@
+"""
+Ускоренная имитация множества существ без GUI.
+
+Существа помещаются в CreaturePool и продвигаются такт за тактом настолько быстро, насколько позволяет процессор; раз в autosave_days ИД их состояния записываются в историю и, если задано хранилище, сохраняются в базу SQLite.
+При jobs > 0 существа делятся между процессами, каждый из которых ведёт свой пул и пишет в ту же базу.
+"""
+
+from collections.abc import Sequence
+from os import cpu_count
+from pathlib import Path
+from time import perf_counter
+
+import model
+
+
+class Report:
+    """Итоги имитации."""
+    def __init__(
+            self,
+            creatures: int = 0,
+            ticks: int = 0,
+            history_bytes: int = 0,
+            saves: int = 0,
+            seconds: float = 0.0,
+    ):
+        self.creatures = creatures
+        # такты, выполненные всеми существами вместе
+        self.ticks = ticks
+        self.history_bytes = history_bytes
+        self.saves = saves
+        self.seconds = seconds
+
+    def __str__(self):
+        return '\n'.join((
+            f'существ: {self.creatures}, тактов: {self.ticks:,}, время: {self.seconds:.3f} с',
+            f'тактов/с: {self.ticks_per_second:,.0f}',
+            f'существ/с: {self.creatures_per_second:,.1f}',
+            f'история: {self.history_bytes:,} байт ({self.history_bytes / max(self.creatures, 1):,.0f} на существо)',
+            f'сохранений: {self.saves}',
+        ))
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.seconds if self.seconds else 0.0
+
+    @property
+    def creatures_per_second(self) -> float:
+        return self.creatures / self.seconds if self.seconds else 0.0
+
+    def merge(self, other: 'Report') -> None:
+        """Добавляет итоги другого процесса; время не суммируется — процессы работают одновременно."""
+        self.creatures += other.creatures
+        self.ticks += other.ticks
+        self.history_bytes += other.history_bytes
+        self.saves += other.saves
+
+
+def simulate(
+        kinds: Sequence[str],
+        creatures: int,
+        days: int,
+        autosave_days: int = 1,
+        storage_path: str | Path = None,
+        ids: Sequence[int] = None,
+        first: int = 0,
+) -> Report:
+    """
+    Продвигает существ на days ИД в текущем процессе.
+
+    Если заданы ids, существа загружаются из базы storage_path, иначе создаются creatures новых существ видов kinds по очереди (first — номер первого, для имён).
+    """
+    from controller import LoadCreature, kinds as catalog
+    from storage import SQLiteStorage
+
+    storage = None if storage_path is None else SQLiteStorage(storage_path)
+    try:
+        if ids is not None:
+            population = [LoadCreature.restore(storage.load(creature_id)) for creature_id in ids]
+        else:
+            population = [
+                model.Creature(catalog().get(kinds[i % len(kinds)]), f'#{i}')
+                for i in range(first, first + creatures)
+            ]
+        pool = model.CreaturePool()
+        for creature in population:
+            pool.add(creature)
+        report = Report(creatures=len(population))
+        start = perf_counter()
+        ticks_left = days * model.Creature.ticks_per_day
+        step = autosave_days * model.Creature.ticks_per_day
+        while ticks_left > 0:
+            ticks = min(step, ticks_left)
+            pool.update(ticks)
+            ticks_left -= ticks
+            for creature in population:
+                creature.autosave()
+            if storage is not None:
+                storage.save_many(population)
+                report.saves += len(population)
+        report.seconds = perf_counter() - start
+        report.ticks = len(population) * days * model.Creature.ticks_per_day
+        report.history_bytes = sum(creature.history.nbytes for creature in population)
+        return report
+    finally:
+        if storage is not None:
+            storage.close()
+
+
+def simulate_parallel(
+        kinds: Sequence[str],
+        creatures: int,
+        days: int,
+        jobs: int = None,
+        autosave_days: int = 1,
+        storage_path: str | Path = None,
+        ids: Sequence[int] = None,
+) -> Report:
+    """То же, что simulate, в jobs процессах (по умолчанию — по числу ядер); при jobs=0 — в текущем процессе."""
+    jobs = (cpu_count() or 1) if jobs is None else jobs
+    if not jobs:
+        return simulate(kinds, creatures, days, autosave_days, storage_path, ids)
+    from concurrent.futures import ProcessPoolExecutor
+
+    total = len(ids) if ids is not None else creatures
+    bounds = [total * i // jobs for i in range(jobs + 1)]
+    report = Report()
+    start = perf_counter()
+    with ProcessPoolExecutor(jobs) as executor:
+        futures = [
+            executor.submit(
+                simulate,
+                kinds,
+                hi - lo,
+                days,
+                autosave_days,
+                storage_path,
+                None if ids is None else ids[lo:hi],
+                lo,
+            )
+            for lo, hi in zip(bounds, bounds[1:])
+            if hi > lo
+        ]
+        for future in futures:
+            report.merge(future.result())
+    report.seconds = perf_counter() - start
+    return report
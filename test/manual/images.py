@@ -0,0 +1,284 @@
+"""Загрузка, масштабирование и кэширование изображений для GUI, атласы кадров анимации."""
+
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from hashlib import sha1
+from math import ceil, isqrt
+from pathlib import Path
+from tkinter import PhotoImage, TclError
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+class ImageBank:
+    """
+    Хранилище готовых к показу изображений с двумя уровнями кэша.
+
+    Первый уровень — LRU в памяти, ограниченный суммарным числом пикселей.
+    Второй уровень — уменьшенные копии в формате PNG на диске; копия считается устаревшей, если изменились время модификации или размер исходного файла.
+    """
+    default_cache_dir: Path = ROOT_DIR / 'data/.cache/images'
+
+    def __init__(
+            self,
+            pixel_budget: int = 4_000_000,
+            cache_dir: str | Path | None = default_cache_dir,
+    ):
+        self.pixel_budget = pixel_budget
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self._images: OrderedDict[tuple[Path, int, int], PhotoImage] = OrderedDict()
+        self._pixels = 0
+        self._atlases: dict[tuple, 'SpriteAtlas'] = {}
+
+    def __len__(self):
+        return len(self._images)
+
+    @property
+    def pixels(self) -> int:
+        return self._pixels
+
+    def get(self, img_path: str | Path, width: int, height: int) -> PhotoImage:
+        """Возвращает изображение из файла img_path, приведённое к размеру width × height."""
+        key = (Path(img_path), width, height)
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            return image
+        image = self._load(*key)
+        self._images[key] = image
+        self._pixels += width * height
+        self._evict()
+        return image
+
+    def atlas(self, sprites: Mapping[str, Iterable[str | Path]], size: int) -> 'SpriteAtlas':
+        """
+        Возвращает атлас кадров sprites (имя анимации — файлы её кадров), приведённых к размеру size × size.
+
+        Атлас собирается один раз и сохраняется в дисковый кэш одним файлом PNG; при следующих запусках декодируется только он.
+        """
+        sprites = {name: tuple(Path(frame) for frame in frames) for name, frames in sprites.items()}
+        key = (tuple(sprites.items()), size)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = self._atlases[key] = self._load_atlas(sprites, size)
+        return atlas
+
+    def clear(self) -> None:
+        self._images.clear()
+        self._pixels = 0
+        self._atlases.clear()
+
+    def _evict(self) -> None:
+        # самое последнее изображение остаётся в кэше, даже если оно одно превышает бюджет
+        while self._pixels > self.pixel_budget and len(self._images) > 1:
+            (_, width, height), _ = self._images.popitem(last=False)
+            self._pixels -= width * height
+
+    def _load(self, img_path: Path, width: int, height: int) -> PhotoImage:
+        prefix = self._cache_prefix(img_path, width, height)
+        cached = self._cached_path(img_path, prefix)
+        if cached is not None and cached.is_file():
+            try:
+                return PhotoImage(file=cached)
+            except TclError:
+                cached.unlink(missing_ok=True)
+        image = _scaled(img_path, width, height)
+        if cached is not None:
+            self._store(image, prefix, cached)
+        return image
+
+    def _load_atlas(self, sprites: dict[str, tuple[Path, ...]], size: int) -> 'SpriteAtlas':
+        paths = [frame for frames in sprites.values() for frame in frames]
+        columns = isqrt(max(len(paths) - 1, 0)) + 1
+        rows = ceil(len(paths) / columns)
+        prefix = cached = None
+        if self.cache_dir is not None:
+            names, stats = sha1(), sha1()
+            for img_path in paths:
+                stat = img_path.stat()
+                names.update(f'{img_path.resolve()}\0'.encode('utf-8'))
+                stats.update(f'{stat.st_mtime_ns}\0{stat.st_size}\0'.encode('utf-8'))
+            prefix = f'atlas_{names.hexdigest()[:16]}_{size}'
+            cached = self.cache_dir / f'{prefix}_{stats.hexdigest()[:16]}.png'
+            if cached.is_file():
+                try:
+                    return SpriteAtlas(PhotoImage(file=cached), sprites, size, columns)
+                except TclError:
+                    cached.unlink(missing_ok=True)
+        image = PhotoImage(width=columns * size, height=rows * size)
+        for i, img_path in enumerate(paths):
+            y, x = divmod(i, columns)
+            image.tk.call(image.name, 'copy', _scaled(img_path, size, size).name, '-to', x * size, y * size)
+        if cached is not None:
+            self._store(image, prefix, cached)
+        return SpriteAtlas(image, sprites, size, columns)
+
+    def _cached_path(self, img_path: Path, prefix: str) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        stat = img_path.stat()
+        return self.cache_dir / f'{prefix}_{stat.st_mtime_ns}_{stat.st_size}.png'
+
+    @staticmethod
+    def _cache_prefix(img_path: Path, width: int, height: int) -> str:
+        digest = sha1(str(img_path.resolve()).encode('utf-8')).hexdigest()[:16]
+        return f'{digest}_{width}x{height}'
+
+    def _store(self, image: PhotoImage, prefix: str, cached: Path) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # устаревшие копии того же файла того же размера
+        for stale in self.cache_dir.glob(f'{prefix}_*.png'):
+            stale.unlink(missing_ok=True)
+        temp = cached.with_suffix('.tmp')
+        try:
+            image.write(temp, format='png')
+            temp.replace(cached)
+        except (TclError, OSError):
+            temp.unlink(missing_ok=True)
+
+
+class SpriteAtlas:
+    """
+    Кадры анимаций одного вида в одном изображении: кадры одного размера size × size расположены по строкам в порядке анимаций.
+
+    Кадры вырезаются из атласа при первом обращении и затем отдаются без обращения к диску.
+    """
+    def __init__(
+            self,
+            image: PhotoImage,
+            sprites: Mapping[str, tuple[Path, ...]],
+            size: int,
+            columns: int,
+    ):
+        self.image = image
+        self.size = size
+        self._cells: dict[str, range] = {}
+        start = 0
+        for name, frames in sprites.items():
+            self._cells[name] = range(start, start + len(frames))
+            start += len(frames)
+        self._columns = columns
+        self._frames: dict[str, tuple[PhotoImage, ...]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._cells
+
+    def frames(self, name: str) -> tuple[PhotoImage, ...]:
+        frames = self._frames.get(name)
+        if frames is None:
+            frames = self._frames[name] = tuple(self._crop(i) for i in self._cells[name])
+        return frames
+
+    def frame(self, name: str, seconds: float, fps: float = 8) -> PhotoImage:
+        """Кадр анимации name, показываемый через seconds секунд после её начала."""
+        frames = self.frames(name)
+        return frames[int(seconds * fps) % len(frames)]
+
+    def _crop(self, index: int) -> PhotoImage:
+        size = self.size
+        y, x = divmod(index, self._columns)
+        frame = PhotoImage(width=size, height=size)
+        frame.tk.call(
+            frame.name, 'copy', self.image.name,
+            '-from', x * size, y * size, (x + 1) * size, (y + 1) * size,
+        )
+        return frame
+
+
+def _scaled(img_path: Path, width: int, height: int) -> PhotoImage:
+    image = PhotoImage(file=img_path)
+    old_width, old_height = image.width(), image.height()
+    if old_width == width and old_height == height:
+        return image
+    return resize_image(image, old_width, old_height, width, height)
+
+
+def resize_image(
+        image: PhotoImage,
+        old_width: int,
+        old_height: int,
+        new_width: int,
+        new_height: int,
+        method: str = 'nearest',
+) -> PhotoImage:
+    """Масштабирует изображение: пиксели читаются и записываются одним обращением к Tcl."""
+    rows = _read_pixels(image)
+    if method == 'nearest':
+        data = _nearest(rows, old_width, old_height, new_width, new_height)
+    elif method == 'bilinear':
+        data = _bilinear(rows, old_width, old_height, new_width, new_height)
+    else:
+        raise ValueError(f'unknown scaling method: {method!r}')
+    resized_image = PhotoImage(width=new_width, height=new_height)
+    resized_image.put(data, to=(0, 0))
+    return resized_image
+
+
+def _read_pixels(image: PhotoImage) -> list[tuple[str, ...]]:
+    """Возвращает пиксели изображения построчно в виде строк '#rrggbb'."""
+    tk = image.tk
+    return [
+        tk.splitlist(row)
+        for row in tk.splitlist(tk.call(image.name, 'data'))
+    ]
+
+
+def _nearest(
+        rows: list[tuple[str, ...]],
+        old_width: int,
+        old_height: int,
+        new_width: int,
+        new_height: int
+) -> tuple[str, ...]:
+    xs = [x * old_width // new_width for x in range(new_width)]
+    # одна и та же исходная строка при увеличении повторяется несколько раз подряд
+    scaled_rows: dict[int, str] = {}
+    data = []
+    for y in range(new_height):
+        y_old = y * old_height // new_height
+        row = scaled_rows.get(y_old)
+        if row is None:
+            source = rows[y_old]
+            row = scaled_rows[y_old] = ' '.join([source[x] for x in xs])
+        data.append(row)
+    return tuple(data)
+
+
+def _bilinear(
+        rows: list[tuple[str, ...]],
+        old_width: int,
+        old_height: int,
+        new_width: int,
+        new_height: int
+) -> tuple[str, ...]:
+    pixels = [
+        [(int(c[1:3], 16), int(c[3:5], 16), int(c[5:7], 16)) for c in row]
+        for row in rows
+    ]
+
+    def grid(old: int, new: int) -> list[tuple[int, int, float]]:
+        # для каждой координаты результата: два соседних исходных индекса и вес второго
+        scale = old / new
+        coords = []
+        for i in range(new):
+            pos = min(max((i + 0.5) * scale - 0.5, 0), old - 1)
+            lo = int(pos)
+            coords.append((lo, min(lo + 1, old - 1), pos - lo))
+        return coords
+
+    xs = grid(old_width, new_width)
+    data = []
+    for y0, y1, wy in grid(old_height, new_height):
+        top, bottom = pixels[y0], pixels[y1]
+        row = []
+        for x0, x1, wx in xs:
+            a, b, c, d = top[x0], top[x1], bottom[x0], bottom[x1]
+            row.append('#{:02x}{:02x}{:02x}'.format(*(
+                round(
+                    (a[i] * (1 - wx) + b[i] * wx) * (1 - wy)
+                    + (c[i] * (1 - wx) + d[i] * wx) * wy
+                )
+                for i in range(3)
+            )))
+        data.append(' '.join(row))
+    return tuple(data)
@@ -0,0 +1,410 @@
+"""
+Журнал сохранений существа.
+
+Сохранение состоит из контрольной точки и журнала, который только дописывается:
+
+- контрольная точка (файл path) — полное состояние существа вместе с историей и действиями игрока; записывается во временный файл, который затем атомарно переименовывается;
+- журнал (файл path.log) — двоичные записи о новых состояниях истории, текущем состоянии и действиях игрока.
+
+Каждая запись журнала снабжена порядковым номером и контрольной суммой: запись, оборванная сбоем, отбрасывается при чтении.
+При загрузке читается контрольная точка и применяются только записи журнала с номерами больше сохранённого в ней.
+Периодически журнал переименовывается в path.log.1, а новая контрольная точка записывается в фоновом потоке, после чего path.log.1 удаляется.
+"""
+
+import os
+from array import array
+from json import dumps as jdumps, loads as jloads
+from pathlib import Path
+from struct import Struct, error as StructError
+from sys import byteorder
+from threading import Lock, Thread, get_ident
+from time import time
+from typing import NamedTuple
+from zlib import crc32
+
+import model
+
+
+MAGIC = b'TMGJ'
+
+SNAPSHOT = 1
+SAMPLE = 2
+EVENT = 3
+
+_HEADER = Struct('<I')
+# тип, номер, длина данных
+_RECORD = Struct('<BQI')
+_CRC = Struct('<I')
+_SNAPSHOT = Struct('<qBd')
+_SAMPLE = Struct('<q')
+_EVENT = Struct('<qd')
+
+
+class Event(NamedTuple):
+    """Действие игрока, записанное в журнал."""
+    ticks: int
+    timestamp: float
+    action: str
+
+
+class SavedCreature:
+    """Состояние существа, прочитанное из сохранения."""
+    def __init__(
+            self,
+            kind: str,
+            name: str,
+            timestamp: float,
+            ticks: int,
+            maturity: int,
+            params: dict[str, float],
+            history: model.History,
+            events: list[Event],
+            id: int = None,
+    ):
+        self.id = id
+        self.kind = kind
+        self.name = name
+        self.timestamp = timestamp
+        self.ticks = ticks
+        self.maturity = maturity
+        self.params = params
+        self.history = history
+        self.events = events
+
+
+class Journal:
+    """Журнал сохранений одного существа."""
+    def __init__(
+            self,
+            path: str | Path,
+            checkpoint_every: int = 1000,
+            sync: bool = False,
+    ):
+        self.path = Path(path)
+        self.log_path = self.path.with_name(self.path.name + '.log')
+        self.rotated_path = self.path.with_name(self.path.name + '.log.1')
+        self.checkpoint_every = checkpoint_every
+        self.sync = sync
+        self._seq: int | None = None
+        self._params: tuple[str, ...] | None = None
+        self._columns: tuple[str, ...] | None = None
+        self._recorded = 0
+        self._since_checkpoint = 0
+        # вид и имя существа в контрольной точке: сохранение другого существа начинает журнал заново
+        self._identity: tuple[str, str] | None = None
+        # действия игрока с начала журнала; None — ещё не прочитаны из файлов
+        self._events: list[Event] | None = None
+        self._log = None
+        self._lock = Lock()
+        # замена файла контрольной точки: фоновая запись не заменяет более новую точку
+        self._replace_lock = Lock()
+        self._thread: Thread | None = None
+
+    def exists(self) -> bool:
+        return self.path.is_file()
+
+    def save(self, creature: model.Creature, timestamp: float = None) -> None:
+        """Дописывает в журнал новые состояния истории и текущее состояние существа."""
+        timestamp = time() if timestamp is None else timestamp
+        with self._lock:
+            self._open()
+            params = tuple(cls.__name__ for cls in creature.params)
+            if (
+                    params != self._params
+                    or creature.history.columns != self._columns
+                    or (creature.kind.name, creature.name) != self._identity
+            ):
+                self._checkpoint(creature, timestamp)
+                return
+            history = creature.history
+            first = max(self._recorded, history.recorded - len(history))
+            offset = history.recorded - len(history)
+            ages, columns = history.export(first - offset)
+            chunks = []
+            for i, age in enumerate(ages):
+                values = array('d', (columns[name][i] for name in self._columns))
+                chunks.append(self._record(SAMPLE, _SAMPLE.pack(age) + values.tobytes()))
+            values = array('d', (param.value for param in creature.params.values()))
+            chunks.append(self._record(
+                SNAPSHOT,
+                _SNAPSHOT.pack(creature.ticks, creature.mature.value, timestamp) + values.tobytes()
+            ))
+            self._write(b''.join(chunks))
+            self._recorded = history.recorded
+            self._since_checkpoint += len(chunks)
+            if self._since_checkpoint >= self.checkpoint_every:
+                self._rotate(creature, timestamp)
+
+    def log_event(self, creature: model.Creature, action: str, timestamp: float = None) -> None:
+        """Записывает в журнал действие игрока."""
+        timestamp = time() if timestamp is None else timestamp
+        with self._lock:
+            self._open()
+            if self._params is None or (creature.kind.name, creature.name) != self._identity:
+                self._checkpoint(creature, timestamp)
+            payload = _EVENT.pack(creature.ticks, timestamp) + action.encode('utf-8')
+            self._write(self._record(EVENT, payload))
+            self._events.append(Event(creature.ticks, timestamp, action))
+            self._since_checkpoint += 1
+
+    def checkpoint(self, creature: model.Creature, timestamp: float = None) -> None:
+        """Записывает контрольную точку и очищает журнал."""
+        with self._lock:
+            self._open()
+            self.wait()
+            self._checkpoint(creature, time() if timestamp is None else timestamp)
+
+    def load(self) -> SavedCreature:
+        """Читает контрольную точку и применяет к ней записи журнала."""
+        self.wait()
+        with self._lock:
+            self._close()
+            header, ages, columns = _read_checkpoint(self.path)
+            seq = header['seq']
+            params = dict(header['params'])
+            names = tuple(params)
+            saved = SavedCreature(
+                kind=header['kind'],
+                name=header['name'],
+                timestamp=header['timestamp'],
+                ticks=header['ticks'],
+                maturity=header['maturity'],
+                params=params,
+                history=model.History(retention=model.Creature.history_retention),
+                events=[Event(*event) for event in header.get('events', ())],
+            )
+            column_names = tuple(header['columns'])
+            ages = array('q', ages)
+            columns = {name: array('d', columns[name]) for name in column_names}
+            for path in (self.rotated_path, self.log_path):
+                records, valid = _scan(path)
+                for kind, number, payload in records:
+                    if number <= seq:
+                        continue
+                    seq = number
+                    if kind == SAMPLE:
+                        ages.append(_SAMPLE.unpack_from(payload)[0])
+                        values = array('d', payload[_SAMPLE.size:])
+                        for name, value in zip(column_names, values):
+                            columns[name].append(value)
+                    elif kind == SNAPSHOT:
+                        saved.ticks, saved.maturity, saved.timestamp = _SNAPSHOT.unpack_from(payload)
+                        values = array('d', payload[_SNAPSHOT.size:])
+                        saved.params = dict(zip(names, values))
+                    elif kind == EVENT:
+                        ticks, timestamp = _EVENT.unpack_from(payload)
+                        saved.events.append(Event(ticks, timestamp, payload[_EVENT.size:].decode('utf-8')))
+                if path == self.log_path and path.is_file() and valid < path.stat().st_size:
+                    # оборванная сбоем запись отрезается, чтобы следующие записи можно было прочитать
+                    with open(path, 'r+b') as file:
+                        file.truncate(valid)
+            saved.history = model.History.restore(ages, columns, model.Creature.history_retention)
+            self._seq = seq
+            self._params = names
+            self._columns = column_names
+            self._recorded = len(ages)
+            self._since_checkpoint = 0
+            self._identity = (saved.kind, saved.name)
+            self._events = list(saved.events)
+            return saved
+
+    def wait(self) -> None:
+        """Дожидается окончания фоновой записи контрольной точки."""
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        self.wait()
+        with self._lock:
+            self._close()
+
+    def _open(self) -> None:
+        if self._seq is None:
+            self._seq = self._last_seq()
+        if self._log is None:
+            self._log = open(self.log_path, 'ab')
+
+    def _close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _last_seq(self) -> int:
+        """Наибольший номер записи среди уже существующих файлов сохранения."""
+        try:
+            seq = _read_checkpoint(self.path)[0]['seq']
+        except (OSError, ValueError):
+            seq = 0
+        for path in (self.rotated_path, self.log_path):
+            records, valid = _scan(path)
+            if records:
+                seq = max(seq, records[-1][1])
+            if path == self.log_path and path.is_file() and valid < path.stat().st_size:
+                with open(path, 'r+b') as file:
+                    file.truncate(valid)
+        return seq
+
+    def _record(self, kind: int, payload: bytes) -> bytes:
+        self._seq += 1
+        head = _RECORD.pack(kind, self._seq, len(payload))
+        return head + payload + _CRC.pack(crc32(head + payload))
+
+    def _write(self, data: bytes) -> None:
+        self._log.write(data)
+        self._log.flush()
+        if self.sync:
+            os.fsync(self._log.fileno())
+
+    def _snapshot(self, creature: model.Creature, timestamp: float) -> tuple[bytes, tuple[str, ...]]:
+        """Содержимое контрольной точки; вызывается в потоке, владеющем существом."""
+        ages, columns = creature.history.export(0)
+        identity = (creature.kind.name, creature.name)
+        if identity != self._identity:
+            self._events = self._stored_events(identity)
+        header = {
+            'kind': creature.kind.name,
+            'name': creature.name,
+            'timestamp': timestamp,
+            'ticks': creature.ticks,
+            'maturity': creature.mature.value,
+            'params': [(cls.__name__, param.value) for cls, param in creature.params.items()],
+            'columns': list(columns),
+            'events': [tuple(event) for event in self._events],
+            'length': len(ages),
+            'seq': self._seq,
+            'byteorder': byteorder,
+        }
+        header = jdumps(header, ensure_ascii=False).encode('utf-8')
+        data = b''.join([
+            MAGIC,
+            _HEADER.pack(len(header)),
+            header,
+            ages.tobytes(),
+            *(column.tobytes() for column in columns.values()),
+        ])
+        self._params = tuple(cls.__name__ for cls in creature.params)
+        self._columns = tuple(columns)
+        self._recorded = creature.history.recorded
+        self._since_checkpoint = 0
+        self._identity = identity
+        return data
+
+    def _stored_events(self, identity: tuple[str, str]) -> list[Event]:
+        """Действия игрока, уже сохранённые для существа identity; для другого существа — пустой список."""
+        if self._events is not None:
+            return []
+        try:
+            header = _read_checkpoint(self.path)[0]
+        except (OSError, ValueError):
+            return []
+        if (header['kind'], header['name']) != identity:
+            return []
+        events = [Event(*event) for event in header.get('events', ())]
+        for path in (self.rotated_path, self.log_path):
+            for kind, number, payload in _scan(path)[0]:
+                if kind == EVENT and number > header['seq']:
+                    ticks, timestamp = _EVENT.unpack_from(payload)
+                    events.append(Event(ticks, timestamp, payload[_EVENT.size:].decode('utf-8')))
+        return events
+
+    def _checkpoint(self, creature: model.Creature, timestamp: float) -> None:
+        # фоновая запись предыдущей контрольной точки не должна лечь поверх этой
+        self.wait()
+        data = self._snapshot(creature, timestamp)
+        with self._replace_lock:
+            _write_atomic(self.path, data)
+        self._close()
+        for path in (self.log_path, self.rotated_path):
+            path.unlink(missing_ok=True)
+        self._log = open(self.log_path, 'ab')
+
+    def _rotate(self, creature: model.Creature, timestamp: float) -> None:
+        """Переносит журнал в path.log.1 и записывает контрольную точку в фоновом потоке."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        data = self._snapshot(creature, timestamp)
+        seq = self._seq
+        self._close()
+        if self.rotated_path.exists():
+            # предыдущая контрольная точка не была записана: записи дописываются к уже перенесённым
+            with open(self.rotated_path, 'ab') as rotated:
+                rotated.write(self.log_path.read_bytes())
+            self.log_path.unlink()
+        else:
+            self.log_path.replace(self.rotated_path)
+        self._log = open(self.log_path, 'ab')
+
+        def compact():
+            with self._replace_lock:
+                try:
+                    newer = _read_checkpoint(self.path)[0]['seq'] > seq
+                except (OSError, ValueError):
+                    newer = False
+                if not newer:
+                    _write_atomic(self.path, data)
+            self.rotated_path.unlink(missing_ok=True)
+
+        self._thread = Thread(target=compact, name=f'journal-compact {self.path.name}', daemon=True)
+        self._thread.start()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Записывает файл целиком через временный файл и переименование; у каждого потока свой временный файл."""
+    temp = path.with_name(f'{path.name}.{get_ident()}.tmp')
+    with open(temp, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, path)
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _read_checkpoint(path: Path) -> tuple[dict, array, dict[str, array]]:
+    data = path.read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f'{path} is not a journal checkpoint')
+    offset = len(MAGIC)
+    (size,) = _HEADER.unpack_from(data, offset)
+    offset += _HEADER.size
+    header = jloads(data[offset:offset + size].decode('utf-8'))
+    offset += size
+    length = header['length']
+    ages = array('q', data[offset:offset + 8 * length])
+    offset += 8 * length
+    columns = {}
+    for name in header['columns']:
+        columns[name] = array('d', data[offset:offset + 8 * length])
+        offset += 8 * length
+    if header['byteorder'] != byteorder:
+        ages.byteswap()
+        for column in columns.values():
+            column.byteswap()
+    return header, ages, columns
+
+
+def _scan(path: Path) -> tuple[list[tuple[int, int, bytes]], int]:
+    """Читает записи журнала до первой повреждённой; возвращает их и длину неповреждённой части файла."""
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return [], 0
+    records, offset = [], 0
+    while offset < len(data):
+        try:
+            kind, number, size = _RECORD.unpack_from(data, offset)
+            end = offset + _RECORD.size + size
+            (checksum,) = _CRC.unpack_from(data, end)
+        except StructError:
+            break
+        if crc32(data[offset:end]) != checksum:
+            break
+        records.append((kind, number, data[offset + _RECORD.size:end]))
+        offset = end + _CRC.size
+    return records, offset
@@ -0,0 +1,106 @@
+"""
+Компиляция такта существа для вида и стадии взросления.
+
+Каждый класс параметра описывает своё изменение за такт фрагментом кода (Parameter.rule), в котором значения параметров доступны как локальные переменные с именами классов.
+Из фрагментов всех параметров MatureOptions собирается одна функция: пороги и границы диапазонов подставляются в код константами, порядок вычисления определяется зависимостями параметров.
+"""
+
+from array import array
+from textwrap import indent
+from typing import Callable, Type
+
+
+def order(params: dict[Type, object]) -> list[Type]:
+    """
+    Упорядочивает классы параметров так, чтобы параметр вычислялся раньше тех, от которых он зависит (depends_on — имена классов).
+
+    Тем самым каждое правило видит значения зависимостей на начало такта — как при последовательном вызове Parameter.update.
+    """
+    result: list[Type] = []
+    state: dict[Type, bool] = {}
+
+    def visit(cls: Type):
+        if state.get(cls) is True:
+            return
+        if state.get(cls) is False:
+            raise ValueError(f'cyclic parameter dependency involving {cls.__name__}')
+        state[cls] = False
+        for other in params:
+            if other is not cls and cls.__name__ in getattr(other, 'depends_on', ()):
+                visit(other)
+        state[cls] = True
+        result.append(cls)
+
+    for cls in params:
+        visit(cls)
+    return result
+
+
+def _body(options, classes: list[Type]) -> str | None:
+    """Тело такта: правила всех параметров с приведением к диапазону после каждого."""
+    parts = []
+    for cls in classes:
+        rule = cls.rule(options)
+        if rule is None:
+            return None
+        name = cls.__name__
+        min_, max_ = options.params[cls].range
+        parts.append(
+            f'# {name}\n'
+            f'{rule}\n'
+            f'if {name} < {min_!r}:\n'
+            f'    {name} = {min_!r}\n'
+            f'elif {name} > {max_!r}:\n'
+            f'    {name} = {max_!r}\n'
+        )
+    return ''.join(parts)
+
+
+def _build(source: str, namespace: dict, name: str) -> Callable:
+    exec(compile(source, f'<kernel {name}>', 'exec'), namespace)
+    return namespace[name]
+
+
+def creature_kernel(options) -> Callable[[dict], None]:
+    """
+    Возвращает функцию kernel(params), выполняющую один такт для словаря параметров существа.
+
+    Если у какого-либо параметра нет правила, такт выполняется вызовом Parameter.update для каждого параметра.
+    """
+    classes = order(options.params)
+    body = _body(options, classes)
+    if body is None:
+        def kernel(params: dict):
+            for param in params.values():
+                param.update()
+        return kernel
+    names = [cls.__name__ for cls in classes]
+    namespace = {f'_c{i}': cls for i, cls in enumerate(classes)}
+    source = (
+        'def kernel(params):\n'
+        + ''.join(f'    _p{i} = params[_c{i}]\n' for i in range(len(classes)))
+        + ''.join(f'    {name} = _p{i}._Parameter__value\n' for i, name in enumerate(names))
+        + indent(body, '    ')
+        + ''.join(f'    _p{i}._Parameter__value = {name}\n' for i, name in enumerate(names))
+    )
+    return _build(source, namespace, 'kernel')
+
+
+def column_kernel(options) -> Callable[[dict], None]:
+    """Возвращает функцию kernel(columns), выполняющую один такт для столбцов группы CreaturePool."""
+    classes = order(options.params)
+    body = _body(options, classes)
+    if body is None:
+        missing = ', '.join(cls.__name__ for cls in classes if cls.rule(options) is None)
+        raise TypeError(f'parameters without rule cannot be pooled: {missing}')
+    names = [cls.__name__ for cls in classes]
+    namespace = {f'_c{i}': cls for i, cls in enumerate(classes)} | {'array': array}
+    source = (
+        'def kernel(columns):\n'
+        + ''.join(f'    _n{i} = []\n    _a{i} = _n{i}.append\n' for i in range(len(classes)))
+        + f"    for {', '.join(names)}, in zip({', '.join(f'columns[_c{i}]' for i in range(len(classes)))}):\n"
+        + indent(body, '        ')
+        + ''.join(f'        _a{i}({name})\n' for i, name in enumerate(names))
+        + ''.join(f"    columns[_c{i}] = array('d', _n{i})\n" for i in range(len(classes)))
+    )
+    return _build(source, namespace, 'kernel')
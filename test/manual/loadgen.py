@@ -0,0 +1,100 @@
+"""
+Нагрузка на сервер питомцев (server.PetServer) для локальных замеров.
+
+Каждый из clients клиентов открывает своё соединение, создаёт питомца и отправляет requests запросов подряд: случайное из доступных действий игрока или запрос состояния.
+Замеряются число запросов в секунду и задержки ответов (p50, p99, максимум).
+"""
+
+import asyncio
+from json import dumps as jdumps, loads as jloads
+from random import Random
+from time import perf_counter
+
+
+class LoadReport:
+    """Итоги нагрузки."""
+    def __init__(self, latencies: list[float], errors: int, seconds: float):
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.seconds = seconds
+
+    @property
+    def requests_per_second(self) -> float:
+        return len(self.latencies) / self.seconds if self.seconds else 0.0
+
+    def quantile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        return self.latencies[min(int(q * len(self.latencies)), len(self.latencies) - 1)]
+
+    def __str__(self):
+        return '\n'.join((
+            f'запросов: {len(self.latencies):,}, ошибок: {self.errors}, время: {self.seconds:.3f} с',
+            f'запросов/с: {self.requests_per_second:,.0f}',
+            f'задержка: p50 {self.quantile(0.5) * 1000:.3f} мс, '
+            f'p99 {self.quantile(0.99) * 1000:.3f} мс, '
+            f'макс. {self.latencies[-1] * 1000 if self.latencies else 0:.3f} мс',
+        ))
+
+
+async def client(
+        number: int,
+        requests: int,
+        kind: str,
+        host: str,
+        port: int,
+        unix: str,
+        latencies: list[float],
+        seed: int,
+) -> int:
+    """Выполняет запросы одного клиента и возвращает число ответов с ошибкой."""
+    if unix is not None:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    rnd = Random(seed + number)
+    errors = 0
+
+    async def call(request: dict) -> dict:
+        start = perf_counter()
+        writer.write(jdumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+        await writer.drain()
+        response = jloads(await reader.readline())
+        latencies.append(perf_counter() - start)
+        return response
+
+    created = await call({'id': 0, 'op': 'create', 'kind': kind, 'name': f'Питомец {number}'})
+    if not created['ok']:
+        raise RuntimeError(created['error'])
+    pet, actions = created['pet'], created['actions']
+    for i in range(1, requests):
+        if rnd.random() < 0.5:
+            response = await call({'id': i, 'op': 'get', 'pet': pet})
+        else:
+            response = await call({'id': i, 'op': 'action', 'pet': pet, 'action': rnd.choice(actions)})
+        if response['ok']:
+            # набор действий меняется при взрослении
+            actions = response['actions']
+        else:
+            errors += 1
+    writer.close()
+    await writer.wait_closed()
+    return errors
+
+
+async def run(
+        clients: int = 100,
+        requests: int = 100,
+        kind: str = 'Кот',
+        host: str = '127.0.0.1',
+        port: int = 8765,
+        unix: str = None,
+        seed: int = 20240501,
+) -> LoadReport:
+    latencies: list[float] = []
+    start = perf_counter()
+    errors = await asyncio.gather(*(
+        client(number, requests, kind, host, port, unix, latencies, seed)
+        for number in range(clients)
+    ))
+    return LoadReport(latencies, sum(errors), perf_counter() - start)
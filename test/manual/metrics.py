@@ -0,0 +1,271 @@
+"""
+Счётчики и замеры длительности горячих участков имитации.
+
+Пока замеры не включены, код приложения не меняется и ничего не стоит; enable() оборачивает методы из TARGETS, disable() возвращает исходные.
+Накопленные данные выводятся текстом (Registry.snapshot) или в формате Prometheus (Registry.prometheus, write_prometheus).
+Если задан бюджет такта, каждый такт (Creature.update или проход CreaturePool.update) выполняется под cProfile, и профили тактов, превысивших бюджет, сохраняются в файлы .prof.
+"""
+
+import os
+import sys
+from bisect import bisect_left
+from collections.abc import Callable
+from functools import wraps
+from itertools import count
+from pathlib import Path
+from threading import Lock
+from time import perf_counter, time
+
+
+# модуль, путь к методу, имя показателя
+TARGETS: tuple[tuple[str, str, str], ...] = (
+    ('model', 'Creature.update', 'creature_update'),
+    ('model', 'Creature.autosave', 'creature_autosave'),
+    ('model', 'CreaturePool.update', 'pool_update'),
+    ('controller', 'LoadCreature.save', 'creature_save'),
+    ('controller', 'LoadCreature.load', 'creature_load'),
+    ('autosave', 'AutosaveService._write', 'autosave_flush'),
+    ('view', 'Game.update_creature', 'game_update_creature'),
+    ('view', 'Game.change_image', 'game_change_image'),
+    ('images', 'ImageBank.get', 'image_get'),
+)
+
+# замеры тактов, к которым применяется бюджет tick_budget
+TICK_TARGETS: frozenset[str] = frozenset({'creature_update', 'pool_update'})
+
+# границы корзин гистограмм, с: от 1 мкс до 10 с
+BUCKETS: tuple[float, ...] = tuple(
+    base * 10.0 ** exponent
+    for exponent in range(-6, 1)
+    for base in (1, 2.5, 5)
+) + (10.0,)
+
+
+class Counter:
+    __slots__ = ('name', 'help', 'value')
+
+    def __init__(self, name: str, help: str = ''):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+
+class Timer:
+    """Гистограмма длительностей: число вызовов, сумма, максимум и число вызовов по корзинам BUCKETS."""
+    __slots__ = ('name', 'help', 'count', 'sum', 'max', 'buckets')
+
+    def __init__(self, name: str, help: str = ''):
+        self.name = name
+        self.help = help
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        # последняя корзина — длительности больше BUCKETS[-1]
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля q по корзинам: верхняя граница корзины, в которую он попадает."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for bound, number in zip(BUCKETS, self.buckets):
+            total += number
+            if total >= rank:
+                return bound
+        return self.max
+
+
+class Registry:
+    """Набор счётчиков и гистограмм по именам."""
+    def __init__(self, prefix: str = 'tamagotchi'):
+        self.prefix = prefix
+        self.counters: dict[str, Counter] = {}
+        self.timers: dict[str, Timer] = {}
+
+    def counter(self, name: str, help: str = '') -> Counter:
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = Counter(name, help)
+        return counter
+
+    def timer(self, name: str, help: str = '') -> Timer:
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Timer(name, help)
+        return timer
+
+    def snapshot(self) -> str:
+        """Текстовая сводка: для гистограмм — число вызовов, среднее, p50, p99 и максимум в мс."""
+        lines = []
+        for timer in self.timers.values():
+            lines.append(
+                f'{timer.name}: {timer.count} вызовов, '
+                f'среднее {timer.mean * 1000:.3f} мс, '
+                f'p50 ≤ {timer.quantile(0.5) * 1000:.3f} мс, '
+                f'p99 ≤ {timer.quantile(0.99) * 1000:.3f} мс, '
+                f'макс. {timer.max * 1000:.3f} мс'
+            )
+        for counter in self.counters.values():
+            lines.append(f'{counter.name}: {counter.value}')
+        return '\n'.join(lines)
+
+    def prometheus(self) -> str:
+        """Показатели в текстовом формате Prometheus."""
+        lines = []
+        for counter in self.counters.values():
+            name = f'{self.prefix}_{counter.name}_total'
+            if counter.help:
+                lines.append(f'# HELP {name} {counter.help}')
+            lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name} {counter.value}')
+        for timer in self.timers.values():
+            name = f'{self.prefix}_{timer.name}_seconds'
+            if timer.help:
+                lines.append(f'# HELP {name} {timer.help}')
+            lines.append(f'# TYPE {name} histogram')
+            total = 0
+            for bound, number in zip(BUCKETS, timer.buckets):
+                total += number
+                lines.append(f'{name}_bucket{{le="{bound:g}"}} {total}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {timer.count}')
+            lines.append(f'{name}_sum {timer.sum!r}')
+            lines.append(f'{name}_count {timer.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str | Path) -> None:
+        """Записывает показатели в файл (например, для textfile collector node_exporter) через временный файл."""
+        path = Path(path)
+        temp = path.with_name(path.name + '.tmp')
+        temp.write_text(self.prometheus(), encoding='utf-8')
+        os.replace(temp, path)
+
+
+class SlowTickProfiler:
+    """
+    Профилирует такты и сохраняет профили тактов длиннее budget секунд в каталог directory.
+
+    Профилируется каждый every-й такт; сохраняется не более limit профилей.
+    """
+    def __init__(self, budget: float, directory: str | Path, every: int = 1, limit: int = 100):
+        self.budget = budget
+        self.directory = Path(directory)
+        self.every = every
+        self.limit = limit
+        self.dumped = 0
+        self._calls = count()
+        self._lock = Lock()
+
+    def __call__(self, func: Callable, *args, **kwargs):
+        if next(self._calls) % self.every or self.dumped >= self.limit or sys.getprofile() is not None:
+            return func(*args, **kwargs)
+        from cProfile import Profile
+
+        profile = Profile()
+        start = perf_counter()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            if elapsed > self.budget:
+                with self._lock:
+                    if self.dumped < self.limit:
+                        self.directory.mkdir(parents=True, exist_ok=True)
+                        profile.dump_stats(self.directory / f'tick_{time():.6f}_{elapsed * 1000:.1f}ms.prof')
+                        self.dumped += 1
+
+
+registry = Registry()
+_originals: list[tuple[type, str, object]] = []
+
+
+def enabled() -> bool:
+    return bool(_originals)
+
+
+def enable(
+        metrics: Registry = None,
+        tick_budget: float = None,
+        profile_dir: str | Path = 'profiles',
+) -> Registry:
+    """
+    Оборачивает методы TARGETS замерами длительности; модули, которые ещё не импортированы, не затрагиваются.
+
+    tick_budget — бюджет одного вызова Creature.update или CreaturePool.update (TICK_TARGETS) в секундах для SlowTickProfiler.
+    """
+    global registry
+    if enabled():
+        disable()
+    if metrics is not None:
+        registry = metrics
+    profiler = None if tick_budget is None else SlowTickProfiler(tick_budget, profile_dir)
+    slow_ticks = registry.counter('slow_ticks', f'такты длиннее {tick_budget} с') if profiler else None
+    for module_name, target, name in TARGETS:
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        class_name, attribute = target.split('.')
+        cls = getattr(module, class_name)
+        original = cls.__dict__[attribute]
+        timer = registry.timer(name, f'длительность {target}')
+        if name in TICK_TARGETS and profiler is not None:
+            wrapped = _wrap(original, timer, profiler, tick_budget, slow_ticks)
+        else:
+            wrapped = _wrap(original, timer)
+        setattr(cls, attribute, wrapped)
+        _originals.append((cls, attribute, original))
+    return registry
+
+
+def disable() -> None:
+    """Возвращает исходные методы."""
+    while _originals:
+        cls, attribute, original = _originals.pop()
+        setattr(cls, attribute, original)
+
+
+def _wrap(
+        original,
+        timer: Timer,
+        profiler: SlowTickProfiler = None,
+        budget: float = None,
+        slow: Counter = None,
+):
+    is_classmethod = isinstance(original, classmethod)
+    func = original.__func__ if is_classmethod else original
+
+    if profiler is None:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timer.observe(perf_counter() - start)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return profiler(func, *args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                timer.observe(elapsed)
+                if elapsed > budget:
+                    slow.inc()
+
+    return classmethod(wrapper) if is_classmethod else wrapper
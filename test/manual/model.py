@@ -1,12 +1,18 @@
 from abc import ABC, abstractmethod
-from collections.abc import Iterable
+from array import array
+from collections import deque
+from collections.abc import Callable, Iterable, Sequence
 from enum import Enum
+from heapq import heappop, heappush
+from itertools import count
+from math import ceil, nan
 from numbers import Real
 from pathlib import Path
-from sys import path
-from typing import Type, Self
+from typing import NamedTuple, Type, Self
 
-ROOT_DIR = Path(path[0]).parent.parent
+import kernels
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 
 
 class Maturity(Enum):
@@ -17,24 +23,25 @@ class Maturity(Enum):
 
 
 class Creature:
+    __slots__ = ('id', 'kind', 'name', 'mature', 'params', 'history', '_ticks', '_slot', '_timers')
+    ticks_per_day: int = 24
+    history_retention: 'Retention | None' = None
+
     def __init__(self, kind: 'Kind', name: str):
+        # идентификатор в хранилище сохранений, назначается при первом сохранении
+        self.id: int | None = None
         self.kind = kind
         self.name = name
-        self.age: int = 0
+        self._ticks: int = 0
+        self._slot: _PoolSlot | None = None
+        # запись в планировщике активностей (см. scheduler)
+        self._timers = None
         self.mature: Maturity = Maturity.CUB
         self.params: dict[Type, Parameter] = {
-            cls: cls(param.value, param.min, param.max, self)
+            cls: param.instance(self)
             for cls, param in kind[self.mature].params.items()
         }
-        self.player_actions: list[Action] = [
-            act.__class__(**(act.__dict__ | {'origin': self}))
-            for act in kind[self.mature].player_actions
-        ]
-        self.creature_actions: set[Action] = {
-            act.__class__(**(act.__dict__ | {'origin': self}))
-            for act in kind[self.mature].creature_actions
-        }
-        self.history: History = History()
+        self.history: History = History(retention=self.history_retention)
 
     def __repr__(self):
         return '\n'.join(
@@ -45,44 +52,577 @@ class Creature:
     def __str__(self):
         return f"{self.name}: {'/'.join(f'{p.value:.1f}' for p in self.params.values())}"
 
+    @property
+    def player_actions(self) -> list['Action']:
+        """Действия игрока, общие для всех существ того же вида и стадии."""
+        return self.kind[self.mature].player_actions
+
+    @property
+    def creature_actions(self) -> set['Action']:
+        """Активности, общие для всех существ того же вида и стадии."""
+        return self.kind[self.mature].creature_actions
+
+    @property
+    def ticks(self) -> int:
+        """Число прожитых тактов."""
+        if self._slot is None:
+            return self._ticks
+        return self._slot.pool.clock - self._slot.born
+
+    @ticks.setter
+    def ticks(self, value: int):
+        if self._slot is None:
+            self._ticks = value
+        else:
+            self._slot.pool._set_ticks(self._slot, value)
+
+    @property
+    def age(self) -> int:
+        """Возраст в ИД."""
+        return self.ticks // self.ticks_per_day
+
     def update(self):
-        for param in self.params.values():
-            param.update()
+        if self._slot is not None:
+            raise RuntimeError('существа из пула обновляются методом CreaturePool.update')
+        self.kind[self.mature].kernel(self.params)
+        self.ticks += 1
+        if not self.ticks % self.ticks_per_day:
+            new_mature = self.kind.mature_at(self.age)
+            if new_mature is not self.mature:
+                self._grow_up(new_mature)
 
     def _grow_up(self, new_mature: Maturity):
         # Maturity(self.mature.value + 1)
-        for cls, param in self.kind[new_mature].params.items():
-            self.params[cls].min = param.min
-            self.params[cls].max = param.max
+        if self._slot is not None:
+            self._slot.pool._regroup(self._slot, new_mature)
+        else:
+            self.mature = new_mature
+            for cls, param in self.kind[new_mature].params.items():
+                own = self.params[cls]
+                own.bounds = param.bounds
+                # значение приводится к новому диапазону
+                own.value = own.value
+        if self._timers is not None:
+            self._timers.scheduler._rebuild(self._timers)
 
     def autosave(self):
-        state = State(self.age)
-        for param in self.params.values():
-            setattr(state, param.__class__.__name__, param.value)
-        self.history.append(state)
+        self.history.record(self.age, {
+            cls.__name__: param.value
+            for cls, param in self.params.items()
+        })
+
+
+class CreaturePool:
+    """
+    Хранилище параметров множества существ в виде столбцов.
+
+    Значения каждого параметра хранятся в непрерывных массивах array('d'), сгруппированных по виду и стадии взросления: внутри группы диапазоны параметров одинаковы, поэтому такт всей группы — несколько проходов по массивам без обращения к объектам Parameter.
+    Добавленные в пул существа продолжают работать как обычно: их параметры становятся представлениями строк пула.
+    """
+    def __init__(self):
+        self.clock: int = 0
+        self._groups: dict[tuple[int, Maturity], _PoolGroup] = {}
+
+    def __len__(self):
+        return sum(len(group) for group in self._groups.values())
+
+    def __iter__(self):
+        for group in self._groups.values():
+            for slot in group.slots:
+                yield slot.creature
+
+    def __contains__(self, creature: Creature):
+        return creature._slot is not None and creature._slot.pool is self
+
+    def add(self, creature: Creature) -> None:
+        if creature._slot is not None:
+            raise ValueError(f'{creature.name} уже находится в пуле')
+        values = {cls: param.value for cls, param in creature.params.items()}
+        slot = _PoolSlot(self, creature, self.clock - creature._ticks)
+        self._group(creature.kind, creature.mature).append(slot, values)
+        creature._slot = slot
+        creature.params = {
+            cls: PooledParameter(slot, cls)
+            for cls in values
+        }
+
+    def remove(self, creature: Creature) -> None:
+        slot = creature._slot
+        if slot is None or slot.pool is not self:
+            raise ValueError(f'{creature.name} не находится в пуле')
+        values = slot.group.pop(slot)
+        creature._ticks = self.clock - slot.born
+        creature._slot = None
+        options = creature.kind[creature.mature]
+        creature.params = {
+            cls: options.params[cls].instance(creature, values[cls])
+            for cls in values
+        }
+
+    def update(self, ticks: int = 1) -> None:
+        """Выполняет ticks тактов для всех существ пула."""
+        for _ in range(ticks):
+            for group in list(self._groups.values()):
+                group.update()
+            self.clock += 1
+            for group in list(self._groups.values()):
+                for slot in group.due(self.clock):
+                    creature = slot.creature
+                    new_mature = creature.kind.mature_at(creature.age)
+                    if new_mature is not creature.mature:
+                        self._regroup(slot, new_mature)
+
+    def _group(self, kind: 'Kind', mature: Maturity) -> '_PoolGroup':
+        key = (id(kind), mature)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _PoolGroup(kind, mature)
+        return group
+
+    def _regroup(self, slot: '_PoolSlot', new_mature: Maturity) -> None:
+        values = slot.group.pop(slot)
+        slot.creature.mature = new_mature
+        self._group(slot.creature.kind, new_mature).append(slot, values)
+
+    def _set_ticks(self, slot: '_PoolSlot', ticks: int) -> None:
+        slot.born = self.clock - ticks
+        slot.group.schedule(slot)
+
+
+class _PoolSlot:
+    """Положение существа в пуле: группа и номер строки в её столбцах."""
+    __slots__ = ('pool', 'creature', 'born', 'group', 'index')
+
+    def __init__(self, pool: CreaturePool, creature: Creature, born: int):
+        self.pool = pool
+        self.creature = creature
+        self.born = born
+        self.group: _PoolGroup | None = None
+        self.index: int = -1
+
+
+class _PoolGroup:
+    """Существа одного вида на одной стадии взросления."""
+    def __init__(self, kind: 'Kind', mature: Maturity):
+        self.kind = kind
+        self.mature = mature
+        self.options: MatureOptions = kind[mature]
+        self.mins: dict[Type, float] = {cls: param.min for cls, param in self.options.params.items()}
+        self.maxes: dict[Type, float] = {cls: param.max for cls, param in self.options.params.items()}
+        self.columns: dict[Type, array] = {cls: array('d') for cls in self.options.params}
+        self.slots: list[_PoolSlot] = []
+        stage_end = kind.stage_end(mature)
+        self.boundary = None if stage_end is None else stage_end * Creature.ticks_per_day
+        # (такт пула, на котором существо покидает стадию, порядковый номер, слот)
+        self._transitions: list[tuple[int, int, _PoolSlot]] = []
+        self._order = count()
+
+    def __len__(self):
+        return len(self.slots)
+
+    def append(self, slot: _PoolSlot, values: dict[Type, float]) -> None:
+        slot.group, slot.index = self, len(self.slots)
+        self.slots.append(slot)
+        for cls, column in self.columns.items():
+            value = values.get(cls, self.options.params[cls].value)
+            column.append(min(max(value, self.mins[cls]), self.maxes[cls]))
+        self.schedule(slot)
+
+    def pop(self, slot: _PoolSlot) -> dict[Type, float]:
+        """Удаляет строку слота, перенося на её место последнюю строку."""
+        index, last = slot.index, len(self.slots) - 1
+        values = {cls: column[index] for cls, column in self.columns.items()}
+        moved = self.slots[last]
+        self.slots[index] = moved
+        moved.index = index
+        self.slots.pop()
+        for column in self.columns.values():
+            column[index] = column[last]
+            column.pop()
+        slot.group, slot.index = None, -1
+        return values
+
+    def schedule(self, slot: _PoolSlot) -> None:
+        if self.boundary is not None:
+            heappush(self._transitions, (slot.born + self.boundary, next(self._order), slot))
+
+    def due(self, clock: int) -> list[_PoolSlot]:
+        """Слоты, достигшие конца стадии к такту clock."""
+        result = []
+        while self._transitions and self._transitions[0][0] <= clock:
+            at, _, slot = heappop(self._transitions)
+            # записи о покинувших группу или помолодевших существах устаревают
+            if slot.group is self and slot.born + self.boundary == at:
+                result.append(slot)
+        return result
+
+    def update(self) -> None:
+        if self.slots:
+            self.options.column_kernel(self.columns)
+
+
+class PooledParameter:
+    """Параметр существа, значение которого хранится в столбце пула."""
+    __slots__ = ('slot', 'cls', 'name')
+
+    def __init__(self, slot: _PoolSlot, cls: Type['Parameter']):
+        self.slot = slot
+        self.cls = cls
+        self.name = cls.name
+
+    @property
+    def origin(self) -> Creature:
+        return self.slot.creature
+
+    @property
+    def min(self) -> float:
+        return self.slot.group.mins[self.cls]
+
+    @property
+    def max(self) -> float:
+        return self.slot.group.maxes[self.cls]
+
+    @property
+    def range(self):
+        return self.min, self.max
+
+    @property
+    def value(self) -> float:
+        return self.slot.group.columns[self.cls][self.slot.index]
+
+    @value.setter
+    def value(self, number: float):
+        if isinstance(number, Real):
+            self.slot.group.columns[self.cls][self.slot.index] = min(max(number, self.min), self.max)
+        else:
+            raise TypeError
+
+    def update(self):
+        raise RuntimeError('параметры существа из пула обновляются методом CreaturePool.update')
+
+
+class Retention:
+    """
+    Политика хранения истории.
+
+    Последние recent состояний хранятся полностью, более старые сворачиваются в уровни с убывающим разрешением.
+    Каждый уровень tiers задаётся парой (factor, capacity): корзина уровня объединяет factor корзин предыдущего уровня (для первого уровня — factor состояний), уровень хранит не более capacity корзин.
+    Корзины, вытесненные из последнего уровня, удаляются.
+    """
+    def __init__(
+            self,
+            recent: int = 1024,
+            tiers: Iterable[tuple[int, int]] = ((24, 240), (10, 240)),
+    ):
+        self.recent = recent
+        self.tiers = tuple(tiers)
+        if not self.tiers:
+            raise ValueError('retention needs at least one tier')
+        if not 1 <= self.tiers[0][0] <= recent:
+            raise ValueError('first tier factor must be between 1 and recent')
+        for (_, capacity), (factor, _) in zip(self.tiers, self.tiers[1:]):
+            if not 1 <= factor <= capacity:
+                raise ValueError('tier factor must be between 1 and capacity of the previous tier')
+
+
+class Aggregate(NamedTuple):
+    """Сводка значений параметра за промежуток возрастов [start, end]."""
+    start: int
+    end: int
+    count: int
+    min: float
+    max: float
+    mean: float
+
+    @classmethod
+    def merge(cls, aggregates: Sequence['Aggregate']) -> 'Aggregate':
+        total = sum(a.count for a in aggregates)
+        return cls(
+            aggregates[0].start,
+            aggregates[-1].end,
+            total,
+            min(a.min for a in aggregates),
+            max(a.max for a in aggregates),
+            sum(a.mean * a.count for a in aggregates) / total,
+        )
 
 
-class History(list):
-    def get_param_history(self, param_name: str) -> tuple[float, ...]:
-        return tuple(
-            getattr(state, param_name)
-            for state in self
+class _Bucket:
+    """Свёрнутый участок истории: по каждому параметру — минимум, максимум, сумма и число значений."""
+    def __init__(self, start: int, end: int, stats: dict[str, tuple[float, float, float, int]]):
+        self.start = start
+        self.end = end
+        self.stats = stats
+
+    @classmethod
+    def from_columns(cls, ages: array, columns: dict[str, array], lo: int, hi: int) -> '_Bucket':
+        stats = {}
+        for name, column in columns.items():
+            values = [v for v in column[lo:hi] if v == v]
+            if values:
+                stats[name] = (min(values), max(values), sum(values), len(values))
+        return cls(ages[lo], ages[hi - 1], stats)
+
+    @classmethod
+    def merge(cls, buckets: Sequence['_Bucket']) -> '_Bucket':
+        stats = {}
+        for bucket in buckets:
+            for name, (low, high, total, number) in bucket.stats.items():
+                if name in stats:
+                    low_, high_, total_, number_ = stats[name]
+                    stats[name] = (min(low, low_), max(high, high_), total + total_, number + number_)
+                else:
+                    stats[name] = (low, high, total, number)
+        return cls(buckets[0].start, buckets[-1].end, stats)
+
+    def aggregate(self, name: str) -> Aggregate | None:
+        if name not in self.stats:
+            return None
+        low, high, total, number = self.stats[name]
+        return Aggregate(self.start, self.end, number, low, high, total / number)
+
+
+class History(Sequence):
+    """
+    История состояний существа в виде столбцов: по одному массиву array('d') на каждый параметр и массив возрастов.
+
+    Ёмкость массивов удваивается при заполнении, поэтому добавление в среднем выполняется за O(1).
+    При увеличении ёмкости создаются новые массивы, а старые остаются нетронутыми — выданные ранее представления get_param_history продолжают ссылаться на корректные данные.
+    Элементы последовательности — объекты State, которые создаются по запросу.
+
+    С политикой retention история занимает постоянный объём памяти: последовательность содержит от recent до 2·recent последних состояний, а более старые доступны только в свёрнутом виде через query.
+    """
+    __slots__ = ('retention', 'recorded', '_initial', '_length', '_capacity', '_ages', '_columns', '_tiers')
+
+    def __init__(self, capacity: int = 16, retention: Retention | None = None):
+        self.retention = retention
+        if retention is not None:
+            capacity = 2 * retention.recent
+        # массивы выделяются при первом добавлении
+        self._initial = max(capacity, 1)
+        self._length = 0
+        self._capacity = 0
+        self._ages = array('q')
+        self._columns: dict[str, array] = {}
+        self._tiers: list[deque[_Bucket]] = [] if retention is None else [deque() for _ in retention.tiers]
+        # число состояний, добавленных за всё время, включая свёрнутые
+        self.recorded = 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index: int | slice) -> 'State | list[State]':
+        if isinstance(index, slice):
+            return [self._state(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('history index out of range')
+        return self._state(index)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self)!r})'
+
+    @property
+    def ages(self) -> memoryview:
+        return memoryview(self._ages)[:self._length].toreadonly()
+
+    @property
+    def nbytes(self) -> int:
+        """Объём памяти под данные столбцов в байтах (без свёрнутых уровней)."""
+        return self._ages.itemsize * self._capacity * (len(self._columns) + 1)
+
+    def append(self, state: 'State') -> None:
+        self.record(state.age, state.values)
+
+    def record(self, age: int, values: dict[str, float]) -> None:
+        """Добавляет состояние с возрастом age и значениями параметров values, не создавая объект State."""
+        if self._length == self._capacity:
+            if self.retention is None or not self._capacity:
+                self._grow()
+            else:
+                self._compact()
+        index = self._length
+        self._ages[index] = age
+        for name, value in values.items():
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = array('d', (nan,)) * self._capacity
+            column[index] = value
+        self._length += 1
+        self.recorded += 1
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return tuple(self._columns)
+
+    def frozen(self) -> Self:
+        """
+        Неизменная копия истории на текущий момент за O(число столбцов), без копирования данных.
+
+        Копия ссылается на те же массивы: новые состояния записываются за её концом, а при росте и свёртке создаются новые массивы, поэтому содержимое копии не меняется.
+        Запись в саму копию сначала копирует массивы.
+        """
+        copy = object.__new__(self.__class__)
+        copy.retention = self.retention
+        copy.recorded = self.recorded
+        copy._initial = self._initial
+        copy._length = self._length
+        copy._capacity = self._length
+        copy._ages = self._ages
+        copy._columns = dict(self._columns)
+        copy._tiers = [deque(tier) for tier in self._tiers]
+        return copy
+
+    def export(self, start: int = 0) -> tuple[array, dict[str, array]]:
+        """Возвращает копии столбцов возрастов и параметров, начиная с состояния start."""
+        return (
+            self._ages[start:self._length],
+            {name: column[start:self._length] for name, column in self._columns.items()},
         )
 
+    @classmethod
+    def restore(
+            cls,
+            ages: array,
+            columns: dict[str, array],
+            retention: Retention | None = None,
+    ) -> Self:
+        """Создаёт историю из столбцов, полученных методом export."""
+        history = cls(retention=retention)
+        history._initial = max(len(ages), history._initial)
+        history._grow()
+        history._ages[:len(ages)] = ages
+        for name, column in columns.items():
+            history._columns[name] = column + array('d', (nan,)) * (history._capacity - len(column))
+        history._length = history.recorded = len(ages)
+        return history
+
+    def get_param_history(self, param_name: str) -> memoryview:
+        """Возвращает значения параметра без копирования данных; отсутствующие в состоянии значения — nan."""
+        column = self._columns.get(param_name)
+        if column is None:
+            return memoryview(array('d'))
+        return memoryview(column)[:self._length].toreadonly()
+
+    def query(
+            self,
+            param_name: str,
+            start: int | None = None,
+            end: int | None = None,
+            points: int | None = None,
+    ) -> list[Aggregate]:
+        """
+        Возвращает значения параметра за промежуток возрастов [start, end] в наилучшем доступном разрешении.
+
+        Для свёрнутых участков используются корзины уровней, для последних состояний — сами состояния.
+        Если получилось больше points значений, соседние значения объединяются.
+        """
+        def overlaps(first: int, last: int) -> bool:
+            return (start is None or last >= start) and (end is None or first <= end)
+
+        result = []
+        for tier in reversed(self._tiers):
+            for bucket in tier:
+                if overlaps(bucket.start, bucket.end):
+                    aggregate = bucket.aggregate(param_name)
+                    if aggregate is not None:
+                        result.append(aggregate)
+        column = self._columns.get(param_name)
+        if column is not None:
+            for age, value in zip(self._ages[:self._length], column[:self._length]):
+                if value == value and overlaps(age, age):
+                    result.append(Aggregate(age, age, 1, value, value, value))
+        if points is not None and len(result) > points:
+            size = ceil(len(result) / points)
+            result = [
+                Aggregate.merge(result[i:i+size])
+                for i in range(0, len(result), size)
+            ]
+        return result
+
+    def _compact(self) -> None:
+        """Сворачивает состояния, вышедшие за окно recent, в первый уровень."""
+        factor = self.retention.tiers[0][0]
+        evicted = (self._length - self.retention.recent) // factor * factor
+        # после restore ёмкость могла превышать 2·recent
+        self._capacity = 2 * self.retention.recent
+        for lo in range(0, evicted, factor):
+            self._tiers[0].append(_Bucket.from_columns(self._ages, self._columns, lo, lo + factor))
+        self._cascade(0)
+        rest = self._length - evicted
+        self._ages = self._ages[evicted:self._length] + array('q', bytes(8 * (self._capacity - rest)))
+        for name, column in self._columns.items():
+            self._columns[name] = column[evicted:self._length] + array('d', (nan,)) * (self._capacity - rest)
+        self._length = rest
+
+    def _cascade(self, level: int) -> None:
+        tier, (_, capacity) = self._tiers[level], self.retention.tiers[level]
+        if len(tier) <= capacity:
+            return
+        if level + 1 == len(self._tiers):
+            while len(tier) > capacity:
+                tier.popleft()
+            return
+        factor = self.retention.tiers[level + 1][0]
+        while len(tier) > capacity:
+            self._tiers[level + 1].append(_Bucket.merge([tier.popleft() for _ in range(factor)]))
+        self._cascade(level + 1)
+
+    def _grow(self) -> None:
+        length = self._length
+        extra = self._capacity or self._initial
+        self._ages = self._ages[:length] + array('q', bytes(8 * extra))
+        for name, column in self._columns.items():
+            self._columns[name] = column[:length] + array('d', (nan,)) * extra
+        self._capacity += extra
+
+    def _state(self, index: int) -> 'State':
+        state = State(self._ages[index])
+        for name, column in self._columns.items():
+            value = column[index]
+            if value == value:
+                setattr(state, name, value)
+        return state
+
 
 class State:
     """
     Хранитель.
-    Атрибуты экземпляра формируются динамически.
+    Атрибуты экземпляра формируются динамически и хранятся в словаре values.
     """
+    __slots__ = ('age', 'values')
+
     def __init__(self, age: int):
-        self.age = age
+        object.__setattr__(self, 'age', age)
+        object.__setattr__(self, 'values', {})
+
+    def __getattr__(self, name: str) -> float:
+        try:
+            return self.values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value):
+        if name in State.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            self.values[name] = value
 
     def __repr__(self):
-        return f"<{'/'.join(f'{v}' for v in self.__dict__.values())}>"
+        return f"<{'/'.join(f'{v}' for v in (self.age, *self.values.values()))}>"
+
+    def to_dict(self) -> dict[str, float]:
+        return {'age': self.age} | self.values
 
 
 class Parameter(ABC):
+    """
+    Параметр существа.
+
+    Диапазон хранится в кортеже bounds, который параметры существ разделяют с параметром из MatureOptions своего вида и стадии.
+    """
+    __slots__ = ('__value', 'bounds', 'origin')
     name: str
 
     def __init__(
@@ -96,13 +636,30 @@ class Parameter(ABC):
             self.__value = value
         else:
             raise ValueError
-        self.min = min_
-        self.max = max_
+        self.bounds = (min_, max_)
         self.origin = origin
 
+    def instance(self, origin: Creature, value: float = None) -> Self:
+        """Создаёт параметр существа origin с тем же диапазоном и начальным значением value."""
+        param = object.__new__(self.__class__)
+        param.bounds = self.bounds
+        param.origin = origin
+        param.__value = self.__value
+        if value is not None:
+            param.value = value
+        return param
+
+    @property
+    def min(self) -> float:
+        return self.bounds[0]
+
+    @property
+    def max(self) -> float:
+        return self.bounds[1]
+
     @property
     def range(self):
-        return self.min, self.max
+        return self.bounds
 
     @property
     def value(self) -> float:
@@ -111,10 +668,11 @@ class Parameter(ABC):
     @value.setter
     def value(self, number: float):
         if isinstance(number, Real):
-            if number < self.min:
-                self.__value = self.min
-            elif self.max < number:
-                self.__value = self.max
+            min_, max_ = self.bounds
+            if number < min_:
+                self.__value = min_
+            elif max_ < number:
+                self.__value = max_
             else:
                 self.__value = number
         else:
@@ -124,9 +682,22 @@ class Parameter(ABC):
     def update(self):
         pass
 
+    @classmethod
+    def rule(cls, options: 'MatureOptions') -> str | None:
+        """
+        Возвращает изменение параметра за такт в виде кода Python для компиляции такта (см. kernels).
+
+        В коде значения параметров доступны как переменные с именами классов параметров; приводить значение к диапазону не нужно.
+        Значения параметров из depends_on соответствуют началу такта.
+        Если правило не задано, такт существа выполняется вызовами update.
+        """
+        return None
+
 
 class Health(Parameter):
+    __slots__ = ()
     name = 'здоровье'
+    depends_on = ('Satiety',)
 
     def update(self):
         hunger = self.origin.kind[self.origin.mature].params[Satiety]
@@ -134,31 +705,47 @@ class Health(Parameter):
         if self.origin.params[Satiety].value < critical:
             self.value -= 0.5
 
+    @classmethod
+    def rule(cls, options: 'MatureOptions') -> str:
+        critical = sum(options.params[Satiety].range) / 4
+        return (
+            f'if Satiety < {critical!r}:\n'
+            f'    Health -= 0.5'
+        )
+
 
 class Satiety(Parameter):
+    __slots__ = ()
     name = 'сытость'
 
     def update(self):
         self.value -= 1
 
+    @classmethod
+    def rule(cls, options: 'MatureOptions') -> str:
+        return 'Satiety -= 1'
+
 
 class Action(ABC):
+    """
+    Действие игрока или активность существа.
+
+    Экземпляры неизменяемы и общие для всех существ одного вида и стадии, поэтому существо передаётся в action аргументом.
+    """
+    __slots__ = ('timer', 'image', 'state')
     name: str
 
     def __init__(
             self,
             timer: int = None,
             image: str | Path = None,
-            origin: Creature = None,
-            **kwargs
     ):
         self.timer = timer
         self.image = image
-        self.origin = origin
         self.state = 'normal'
 
     @abstractmethod
-    def action(self) -> str:
+    def action(self, origin: Creature) -> str:
         pass
 
 
@@ -170,12 +757,13 @@ class NoAction:
             self = super().__new__(cls)
             self.image = ROOT_DIR / 'data/images/no_action.png'
             self.state = 'disabled'
-            self.action = lambda: None
+            self.action = lambda origin=None: None
             cls.__instance = self
         return cls.__instance
 
 
 class Feed(Action):
+    __slots__ = ('amount',)
     name = 'покормить питомца'
 
     def __init__(
@@ -183,36 +771,41 @@ class Feed(Action):
             amount: int,
             timer: int = None,
             image: str | Path = None,
-            origin: Creature = None,
-            **kwargs
     ):
-        super().__init__(timer, image, origin)
+        super().__init__(timer, image)
         self.amount = amount
 
-    def action(self) -> str:
-        self.origin.params[Satiety].value += self.amount
-        return f'вы покормили {self.origin.name}'
+    def action(self, origin: Creature) -> str:
+        origin.params[Satiety].value += self.amount
+        return f'вы покормили {origin.name}'
 
 
 class Play(Action):
+    __slots__ = ()
     name = 'поиграть с питомцем'
 
-    def action(self) -> str:
-        return f'вы играете с {self.origin.name}'
+    def action(self, origin: Creature) -> str:
+        return f'вы играете с {origin.name}'
 
 
 class PlayRope(Action):
-    def action(self) -> str:
+    __slots__ = ()
+
+    def action(self, origin: Creature) -> str:
         return 'верёвочка!'
 
 
 class PlayTail(Action):
-    def action(self) -> str:
+    __slots__ = ()
+
+    def action(self, origin: Creature) -> str:
         return 'бегает за хвостом'
 
 
 class Sleep(Action):
-    def action(self) -> str:
+    __slots__ = ()
+
+    def action(self, origin: Creature) -> str:
         return 'сон'
 
 
@@ -231,6 +824,22 @@ class MatureOptions:
         }
         self.player_actions = player_actions
         self.creature_actions = creature_actions
+        self._kernel = None
+        self._column_kernel = None
+
+    @property
+    def kernel(self) -> Callable[[dict[Type, Parameter]], None]:
+        """Скомпилированный такт для параметров одного существа."""
+        if self._kernel is None:
+            self._kernel = kernels.creature_kernel(self)
+        return self._kernel
+
+    @property
+    def column_kernel(self) -> Callable[[dict[Type, array]], None]:
+        """Скомпилированный такт для столбцов группы CreaturePool."""
+        if self._column_kernel is None:
+            self._column_kernel = kernels.column_kernel(self)
+        return self._column_kernel
 
 
 AgesParameters = dict[Maturity, MatureOptions] | Iterable[tuple[Maturity, MatureOptions]]
@@ -241,158 +850,37 @@ class Kind(dict):
             name: str,
             image_path: str | Path,
             ages_parameters: AgesParameters,
+            animations: dict[str, Iterable[str | Path]] = None,
     ):
         super().__init__(ages_parameters)
         self.name = name
         self.image = Path(image_path)
+        # кадры анимаций активностей: имя класса активности — файлы кадров
+        self.animations: dict[str, tuple[Path, ...]] = {
+            name: tuple(Path(frame) for frame in frames)
+            for name, frames in (animations or {}).items()
+        }
 
+    @property
+    def sprites(self) -> dict[str, tuple[Path, ...]]:
+        """Все изображения вида для атласа: основное изображение под именем 'idle' и кадры анимаций."""
+        return {'idle': (self.image,)} | self.animations
+
+    def stage_end(self, mature: Maturity) -> int | None:
+        """Возвращает возраст в ИД, по достижении которого заканчивается стадия mature; для последней стадии — None."""
+        if mature is max(self, key=lambda m: m.value):
+            return None
+        return sum(
+            self[m].days
+            for m in self
+            if m.value <= mature.value
+        )
 
-
-cat_kind = Kind(
-    'Кот',
-    ROOT_DIR / 'data/images/cat.png',
-    {
-        Maturity.CUB: MatureOptions(
-            4,
-            Health(10, 0, 20),
-            Satiety(5, 0, 25),
-            player_actions=[
-                Feed(amount=20, image=ROOT_DIR / 'data/images/btn1.png'),
-                Play(image=ROOT_DIR / 'data/images/btn2.png')
-            ],
-            creature_actions={
-                PlayRope(timer=100),
-            }
-        ),
-        Maturity.YOUNG: MatureOptions(
-            10,
-            Health(0, 0, 50),
-            Satiety(0, 0, 30),
-            player_actions=[
-                Feed(amount=25, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions={
-                PlayRope(timer=100),
-                Sleep(timer=120),
-            }
-        ),
-        Maturity.ADULT: MatureOptions(
-            20,
-            Health(0, 0, 45),
-            Satiety(0, 0, 25),
-            player_actions=[
-                Feed(amount=20, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions={
-                Sleep(timer=60),
-                PlayRope(timer=180),
-            }
-        ),
-        Maturity.OLD: MatureOptions(
-            12,
-            Health(0, 0, 35),
-            Satiety(0, 0, 20),
-            player_actions=[
-                Feed(amount=10, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions={
-                Sleep(timer=30)
-            }
-        ),
-    }
-)
-dog_kind = Kind(
-    'Пёс',
-    ROOT_DIR / 'data/images/dog.png',
-    {
-        Maturity.CUB: MatureOptions(
-            4,
-            Health(12, 0, 25),
-            Satiety(7, 0, 25),
-            player_actions=[
-                Feed(amount=20, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions={
-                PlayTail(timer=100),
-            }
-        ),
-        Maturity.YOUNG: MatureOptions(
-            11,
-            Health(0, 0, 50),
-            Satiety(0, 0, 30),
-            player_actions=[
-                Feed(amount=25, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions={
-                PlayTail(timer=100),
-                Sleep(timer=120),
-            }
-        ),
-        Maturity.ADULT: MatureOptions(
-            20,
-            Health(0, 0, 45),
-            Satiety(0, 0, 25),
-            player_actions=[
-                Feed(amount=20, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions={
-                Sleep(timer=60),
-                PlayTail(timer=180),
-            }
-        ),
-        Maturity.OLD: MatureOptions(
-            12,
-            Health(0, 0, 35),
-            Satiety(0, 0, 20),
-            player_actions=[
-                Feed(amount=10, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions={
-                Sleep(timer=30)
-            }
-        ),
-    }
-)
-mouse_kind = Kind(
-    'Мыш',
-    ROOT_DIR / 'data/images/mouse.png',
-    {
-        Maturity.CUB: MatureOptions(
-            4,
-            Health(5, 0, 15),
-            Satiety(5, 0, 15),
-            player_actions=[
-                Feed(amount=20, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions=set()
-        ),
-        Maturity.YOUNG: MatureOptions(
-            11,
-            Health(0, 0, 50),
-            Satiety(0, 0, 30),
-            player_actions=[
-                Feed(amount=25, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions=set()
-        ),
-        Maturity.ADULT: MatureOptions(
-            20,
-            Health(0, 0, 45),
-            Satiety(0, 0, 25),
-            player_actions=[
-                Feed(amount=20, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions=set()
-        ),
-        Maturity.OLD: MatureOptions(
-            12,
-            Health(0, 0, 35),
-            Satiety(0, 0, 20),
-            player_actions=[
-                Feed(amount=10, image=ROOT_DIR / 'data/images/btn1.png'),
-            ],
-            creature_actions=set()
-        ),
-    }
-)
-
+    def mature_at(self, age: int) -> Maturity:
+        """Возвращает стадию взросления для возраста age в ИД."""
+        days = 0
+        for mature in sorted(self, key=lambda m: m.value):
+            days += self[mature].days
+            if age < days:
+                return mature
+        return mature
@@ -0,0 +1,116 @@
+"""
+Планировщик активностей существ (ТЗ п.6а).
+
+Активность существа наступает, когда с последнего действия игрока прошло Action.timer тактов, и затем повторяется с тем же периодом, пока игрок бездействует.
+Сроки всех активностей всех существ хранятся в одной куче, поэтому стоимость вызова due зависит только от числа наступивших сроков, а не от числа существ.
+Отменённые и переназначенные сроки из кучи не удаляются: каждая запись помнит поколение расписания существа и при извлечении устаревшие записи пропускаются.
+"""
+
+from heapq import heapify, heappop, heappush
+from itertools import count
+from typing import Iterator
+
+import model
+
+
+class ActivityScheduler:
+    """
+    Расписание активностей множества существ; время измеряется в тактах (например, GameClock.ticks).
+
+    Добавленное существо само сообщает планировщику о смене стадии взросления: расписание перестраивается под новый набор активностей.
+    """
+    # доля устаревших записей, после которой куча перестраивается
+    compact_ratio: float = 0.5
+
+    def __init__(self, now: int = 0):
+        self.now = now
+        # срок, порядковый номер, запись существа, поколение, активность
+        self._heap: list[tuple[int, int, _TimerSlot, int, model.Action]] = []
+        self._seq = count()
+        self._stale = 0
+        self._size = 0
+
+    def __len__(self):
+        """Число запланированных активностей."""
+        return self._size
+
+    def __contains__(self, creature: model.Creature) -> bool:
+        return creature._timers is not None and creature._timers.scheduler is self
+
+    def add(self, creature: model.Creature, now: int = None) -> None:
+        """Начинает отсчёт активностей существа с момента now."""
+        if creature._timers is not None:
+            raise ValueError(f'{creature.name} уже добавлено в планировщик')
+        slot = _TimerSlot(self, creature, self.now if now is None else now)
+        creature._timers = slot
+        self._schedule(slot)
+
+    def remove(self, creature: model.Creature) -> None:
+        slot = self._own(creature)
+        self._cancel(slot)
+        slot.creature = None
+        creature._timers = None
+
+    def reset(self, creature: model.Creature, now: int = None) -> None:
+        """Действие игрока: отсчёт всех активностей существа начинается заново с момента now."""
+        slot = self._own(creature)
+        self._cancel(slot)
+        slot.last = self.now if now is None else now
+        self._schedule(slot)
+
+    def due(self, now: int) -> Iterator[tuple[model.Creature, model.Action]]:
+        """Выдаёт активности, сроки которых наступили к моменту now, в порядке наступления сроков."""
+        self.now = now
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            at, _, slot, generation, action = heappop(heap)
+            if generation != slot.generation:
+                self._stale -= 1
+                continue
+            # после долгого перерыва пропущенные повторы не навёрстываются
+            heappush(heap, (max(at, now) + action.timer, next(self._seq), slot, generation, action))
+            yield slot.creature, action
+
+    def _own(self, creature: model.Creature) -> '_TimerSlot':
+        slot = creature._timers
+        if slot is None or slot.scheduler is not self:
+            raise KeyError(creature.name)
+        return slot
+
+    def _schedule(self, slot: '_TimerSlot') -> None:
+        actions = [action for action in slot.creature.creature_actions if action.timer]
+        for action in actions:
+            heappush(self._heap, (slot.last + action.timer, next(self._seq), slot, slot.generation, action))
+        slot.scheduled = len(actions)
+        self._size += slot.scheduled
+
+    def _cancel(self, slot: '_TimerSlot') -> None:
+        slot.generation += 1
+        self._stale += slot.scheduled
+        self._size -= slot.scheduled
+        slot.scheduled = 0
+        if self._stale > len(self._heap) * self.compact_ratio:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if entry[3] == entry[2].generation]
+        heapify(self._heap)
+        self._stale = 0
+
+    def _rebuild(self, slot: '_TimerSlot') -> None:
+        """Вызывается существом при смене стадии: прежние активности отменяются, новые отсчитываются от последнего действия игрока."""
+        self._cancel(slot)
+        self._schedule(slot)
+
+
+class _TimerSlot:
+    """Запись существа в планировщике."""
+    __slots__ = ('scheduler', 'creature', 'last', 'generation', 'scheduled')
+
+    def __init__(self, scheduler: ActivityScheduler, creature: model.Creature, last: int):
+        self.scheduler = scheduler
+        self.creature = creature
+        # момент последнего действия игрока
+        self.last = last
+        self.generation = 0
+        self.scheduled = 0
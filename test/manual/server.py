@@ -0,0 +1,197 @@
+"""
+Сервер питомцев многих игроков в одном процессе.
+
+Протокол — строки JSON через TCP или Unix-сокет: запрос {"id": ..., "op": ..., ...}, ответ {"id": ..., "ok": true, ...} или {"id": ..., "ok": false, "error": ...}.
+Операции:
+
+- create: kind, name — создать питомца, ответ содержит его номер pet;
+- get: pet — состояние питомца и имена доступных действий игрока;
+- action: pet, action (имя класса действия игрока) — выполнить действие;
+- stats: число питомцев в памяти, выполненные такты, загрузки и выгрузки.
+
+Питомцы в памяти находятся в одном CreaturePool и получают такты одним проходом на каждый шаг игровых часов.
+Питомцы, к которым не обращались idle_seconds секунд, сохраняются и выгружаются; при следующем обращении они загружаются с пересчётом параметров за время отсутствия (LoadCreature.load).
+Хранилище — LoadCreature.storage(); оно должно хранить много существ (Storage.multiple), например SQLiteStorage.
+Если задан сервис autosave, питомцы после действий игрока отмечаются изменёнными и сохраняются им в фоне (см. autosave).
+"""
+
+import asyncio
+from contextlib import AbstractContextManager, nullcontext
+from json import dumps as jdumps, loads as jloads
+from time import monotonic
+
+import model
+from autosave import AutosaveService
+from clock import GameClock
+from controller import App, LoadCreature, kinds
+
+
+class PetServer:
+    def __init__(self, clock: GameClock = None, idle_seconds: float = 300, autosave: AutosaveService = None):
+        if not LoadCreature.storage().multiple:
+            # питомцы различаются по номерам, которые назначает хранилище
+            raise TypeError(f'серверу нужно хранилище многих существ, а не {LoadCreature.storage().__class__.__name__}')
+        self.clock = App.clock() if clock is None else clock
+        self.idle_seconds = idle_seconds
+        self.autosave = autosave
+        self.pool = model.CreaturePool()
+        self.pets: dict[int, model.Creature] = {}
+        self.stats = {'requests': 0, 'loaded': 0, 'evicted': 0, 'ticks': 0}
+        self._last_seen: dict[int, float] = {}
+        # выгружаемые питомцы: загрузка ждёт окончания их сохранения
+        self._saving: dict[int, asyncio.Task] = {}
+        self._loading: dict[int, asyncio.Task] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765, unix: str = None) -> None:
+        """Принимает соединения, пока задача не будет отменена; при остановке все питомцы сохраняются."""
+        if unix is not None:
+            server = await asyncio.start_unix_server(self.handle, unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        self.clock.start()
+        self._tasks = [asyncio.create_task(self._ticker()), asyncio.create_task(self._evictor())]
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await self.evict(list(self.pets))
+            if self.autosave is not None:
+                await asyncio.to_thread(self.autosave.flush)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обрабатывает запросы одного клиента; ответы идут в порядке запросов."""
+        try:
+            while line := await reader.readline():
+                request = {}
+                try:
+                    request = jloads(line)
+                    response = {'ok': True} | await self.request(request)
+                except Exception as exception:
+                    response = {'ok': False, 'error': f'{exception.__class__.__name__}: {exception}'}
+                response['id'] = request.get('id') if isinstance(request, dict) else None
+                writer.write(jdumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def request(self, request: dict) -> dict:
+        self.stats['requests'] += 1
+        op = request['op']
+        if op == 'create':
+            creature = model.Creature(kinds().get(request['kind']), request.get('name', ''))
+            # сохранение назначает питомцу номер
+            await asyncio.to_thread(LoadCreature.save, creature)
+            self._attach(creature)
+            return {'pet': creature.id} | self._state(creature)
+        if op == 'get':
+            return self._state(await self.pet(request['pet']))
+        if op == 'action':
+            creature = await self.pet(request['pet'])
+            action = next(
+                (act for act in creature.player_actions if act.__class__.__name__ == request['action']),
+                None
+            )
+            if action is None:
+                raise LookupError(f"{request['action']} недоступно на стадии {creature.mature.name}")
+            with self._lock():
+                message = action.action(creature)
+            if self.autosave is not None:
+                self.autosave.mark(creature)
+            # запись ждёт замка хранилища, который держат фоновые сохранения, поэтому выполняется вне цикла событий
+            await asyncio.to_thread(LoadCreature.log_action, creature, action)
+            return {'message': message} | self._state(creature)
+        if op == 'stats':
+            return {'pets': len(self.pets), 'clock': self.pool.clock} | self.stats
+        raise ValueError(f'unknown op {op!r}')
+
+    async def pet(self, pet_id: int) -> model.Creature:
+        """Питомец pet_id; выгруженный питомец загружается с пересчётом параметров за время отсутствия."""
+        creature = self.pets.get(pet_id)
+        if creature is None:
+            loading = self._loading.get(pet_id)
+            if loading is None:
+                loading = self._loading[pet_id] = asyncio.create_task(self._load(pet_id))
+            try:
+                creature = await loading
+            finally:
+                self._loading.pop(pet_id, None)
+        self._last_seen[pet_id] = monotonic()
+        return creature
+
+    async def evict(self, pet_ids: list[int]) -> None:
+        """Сохраняет и выгружает питомцев одной транзакцией в отдельном потоке."""
+        creatures = []
+        for pet_id in pet_ids:
+            creature = self.pets.pop(pet_id, None)
+            if creature is None:
+                continue
+            self._last_seen.pop(pet_id, None)
+            with self._lock():
+                self.pool.remove(creature)
+                creature.autosave()
+            creatures.append(creature)
+        if not creatures:
+            return
+        task = asyncio.create_task(asyncio.to_thread(LoadCreature.storage().save_many, creatures))
+        for creature in creatures:
+            self._saving[creature.id] = task
+        try:
+            await task
+        finally:
+            for creature in creatures:
+                if self._saving.get(creature.id) is task:
+                    del self._saving[creature.id]
+        self.stats['evicted'] += len(creatures)
+
+    async def _load(self, pet_id: int) -> model.Creature:
+        saving = self._saving.get(pet_id)
+        if saving is not None:
+            await asyncio.shield(saving)
+        # пока питомец выгружен, время для него идёт так же, как на сервере
+        creature = await asyncio.to_thread(LoadCreature.load, pet_id, self.clock.real_minutes_per_day / 60)
+        self._attach(creature)
+        self.stats['loaded'] += 1
+        return creature
+
+    def _attach(self, creature: model.Creature) -> None:
+        self.pool.add(creature)
+        self.pets[creature.id] = creature
+        self._last_seen[creature.id] = monotonic()
+
+    def _lock(self) -> AbstractContextManager:
+        """Замок на время изменения питомцев: их может копировать поток сервиса autosave."""
+        return nullcontext() if self.autosave is None else self.autosave.lock
+
+    async def _ticker(self) -> None:
+        """Один проход CreaturePool.update по всем питомцам на каждый шаг игровых часов."""
+        while True:
+            await asyncio.sleep(self.clock.until_next())
+            ticks = self.clock.advance()
+            if not ticks:
+                continue
+            with self._lock():
+                self.pool.update(ticks)
+            self.stats['ticks'] += ticks
+
+    async def _evictor(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.idle_seconds / 4, 0.1))
+            border = monotonic() - self.idle_seconds
+            await self.evict([pet_id for pet_id, seen in self._last_seen.items() if seen < border])
+
+    @staticmethod
+    def _state(creature: model.Creature) -> dict:
+        return {
+            'name': creature.name,
+            'kind': creature.kind.name,
+            'ticks': creature.ticks,
+            'age': creature.age,
+            'mature': creature.mature.name,
+            'params': {cls.__name__: param.value for cls, param in creature.params.items()},
+            'actions': [action.__class__.__name__ for action in creature.player_actions],
+        }
@@ -0,0 +1,158 @@
+"""
+Имитация жизни существа в фоновом потоке (ТЗ п.4г).
+
+Такты, активности, запись истории и сохранения выполняются в отдельном потоке, поэтому медленная запись на диск не задерживает интерфейс.
+Поток передаёт интерфейсу неизменяемые снимки состояния через очередь, а интерфейс передаёт потоку действия игрока как команды через другую очередь.
+С существом работает только поток имитации.
+"""
+
+from contextlib import nullcontext
+from collections.abc import Iterable
+from queue import Empty, SimpleQueue
+from threading import Thread
+from typing import Callable, NamedTuple
+
+import model
+from autosave import AutosaveService
+from clock import GameClock
+from events import EventLog
+from journal import Event
+from scheduler import ActivityScheduler
+
+
+class Snapshot(NamedTuple):
+    """Состояние существа после очередной пачки тактов."""
+    ticks: int
+    age: int
+    mature: model.Maturity
+    params: tuple[tuple[str, float], ...]
+    text: str
+    # имя класса последней активности после последнего действия игрока
+    activity: str | None
+    # сообщения о действиях игрока и активностях существа с предыдущего снимка
+    messages: tuple[str, ...]
+
+
+class Simulation(Thread):
+    """
+    Поток имитации одного существа.
+
+    Раз в ИД состояние записывается в историю (Creature.autosave), раз в save_every_days ИД — сохраняется функцией save.
+    Действия игрока и активности записываются функцией log_action; журнал событий events продолжает сохранённые события events загруженного существа.
+    Если задан сервис autosave, вместо сохранения (а также после каждого действия игрока) существо отмечается изменённым, а записывает его поток сервиса; изменения существа выполняются под AutosaveService.lock.
+    """
+    def __init__(
+            self,
+            creature: model.Creature,
+            clock: GameClock,
+            save: Callable[[model.Creature], None] = None,
+            log_action: Callable[[model.Creature, model.Action], None] = None,
+            save_every_days: int = 1,
+            autosave: AutosaveService = None,
+            events: Iterable[Event] = (),
+    ):
+        super().__init__(name=f'simulation {creature.name}', daemon=True)
+        self.creature = creature
+        self.clock = clock
+        self.activities = ActivityScheduler(clock.ticks)
+        self.activities.add(creature)
+        # действия игрока и активности; по журналу восстанавливается состояние на любой такт (EventLog.state_at)
+        self.events = EventLog.restore(creature, events)
+        self.save = save
+        self.log_action = log_action
+        self.save_every_days = save_every_days
+        self.autosave = autosave
+        if autosave is not None:
+            self.save = autosave.mark
+        self._lock = nullcontext() if autosave is None else autosave.lock
+        self.snapshots: SimpleQueue[Snapshot] = SimpleQueue()
+        self._commands: SimpleQueue[Callable[[], str | None] | None] = SimpleQueue()
+        self._messages: list[str] = []
+        self._activity: str | None = None
+
+    def submit(self, command: Callable[[], str | None]) -> None:
+        """Передаёт потоку команду; возвращённая ею строка попадёт в сообщения следующего снимка."""
+        self._commands.put(command)
+
+    def player_action(self, action: model.Action) -> None:
+        self.submit(lambda: self._player_action(action))
+
+    def stop(self, timeout: float = None) -> None:
+        """Останавливает поток; перед остановкой существо сохраняется."""
+        self._commands.put(None)
+        self.join(timeout)
+
+    def run(self) -> None:
+        self.clock.start()
+        self._publish()
+        while True:
+            timeout = 0 if self.clock.due() else self.clock.until_next()
+            for command in self._pending(timeout):
+                if command is None:
+                    if self.save is not None:
+                        self.save(self.creature)
+                    if self.autosave is not None:
+                        self.autosave.flush()
+                    return
+                with self._lock:
+                    message = command()
+                if message:
+                    self._messages.append(message)
+            with self._lock:
+                ticks = self._tick(self.clock.advance())
+            if ticks or self._messages:
+                self._publish()
+
+    def _pending(self, timeout: float) -> list[Callable[[], str | None] | None]:
+        """Команды, поступившие за timeout секунд."""
+        commands = []
+        try:
+            commands.append(self._commands.get(timeout=timeout))
+            while True:
+                commands.append(self._commands.get_nowait())
+        except Empty:
+            pass
+        return commands
+
+    def _player_action(self, action: model.Action) -> str:
+        self.activities.reset(self.creature, self.clock.ticks)
+        self._activity = None
+        if self.log_action is not None:
+            self.log_action(self.creature, action)
+        message = self.events.apply(self.creature, action)
+        if self.autosave is not None:
+            self.autosave.mark(self.creature)
+        return f'{action}\n{message}'
+
+    def _tick(self, ticks: int) -> int:
+        creature = self.creature
+        ticks_per_day = creature.ticks_per_day
+        for _ in range(ticks):
+            creature.update()
+            if not creature.ticks % ticks_per_day:
+                creature.autosave()
+                self.events.record(creature)
+                if self.save is not None and not creature.age % self.save_every_days:
+                    self.save(creature)
+        if ticks:
+            for origin, activity in self.activities.due(self.clock.ticks):
+                self._activity = activity.__class__.__name__
+                message = self.events.apply(origin, activity)
+                if self.log_action is not None:
+                    self.log_action(origin, activity)
+                if message:
+                    self._messages.append(message)
+        return ticks
+
+    def _publish(self) -> None:
+        creature = self.creature
+        self.snapshots.put(Snapshot(
+            ticks=creature.ticks,
+            age=creature.age,
+            mature=creature.mature,
+            params=tuple((cls.__name__, param.value) for cls, param in creature.params.items()),
+            text=repr(creature),
+            activity=self._activity,
+            messages=tuple(self._messages),
+        ))
+        self._messages.clear()
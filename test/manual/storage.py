@@ -0,0 +1,316 @@
+"""
+Хранилища сохранённых существ для LoadCreature.
+
+JournalStorage хранит одно существо в файле журнала (см. journal).
+SQLiteStorage хранит сколько угодно существ в одной базе SQLite с индексами по владельцу, виду и времени сохранения.
+"""
+
+from abc import ABC, abstractmethod
+from array import array
+from collections.abc import Iterable
+from json import dumps as jdumps, loads as jloads
+from pathlib import Path
+from threading import RLock
+from time import time
+
+import model
+from journal import Event, Journal, SavedCreature
+
+
+class Storage(ABC):
+    """Хранилище сохранённых существ."""
+    # хранит много существ и назначает им Creature.id при первом сохранении
+    multiple: bool = False
+
+    @abstractmethod
+    def exists(self, creature_id: int = None) -> bool:
+        """Проверяет, есть ли в хранилище существо creature_id или, если он не указан, хотя бы одно существо."""
+
+    @abstractmethod
+    def save(self, creature: model.Creature, timestamp: float = None) -> None:
+        pass
+
+    def save_many(self, creatures: Iterable[model.Creature], timestamp: float = None) -> None:
+        for creature in creatures:
+            self.save(creature, timestamp)
+
+    @abstractmethod
+    def load(self, creature_id: int = None) -> SavedCreature:
+        pass
+
+    @abstractmethod
+    def log_event(self, creature: model.Creature, action: str, timestamp: float = None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JournalStorage(Storage):
+    """Одно существо в журнале сохранений; creature_id не используется."""
+    def __init__(self, path: str | Path, checkpoint_every: int = 1000):
+        self.path = Path(path)
+        self.journal = Journal(self.path, checkpoint_every)
+
+    def exists(self, creature_id: int = None) -> bool:
+        return self.path.is_file()
+
+    def save(self, creature: model.Creature, timestamp: float = None) -> None:
+        self.journal.save(creature, timestamp)
+
+    def load(self, creature_id: int = None) -> SavedCreature:
+        if self.path.read_bytes()[:1] == b'{':
+            return self._read_json()
+        return self.journal.load()
+
+    def log_event(self, creature: model.Creature, action: str, timestamp: float = None) -> None:
+        self.journal.log_event(creature, action, timestamp)
+
+    def close(self) -> None:
+        self.journal.close()
+
+    def _read_json(self) -> SavedCreature:
+        """Читает сохранение в прежнем формате JSON."""
+        data = jloads(self.path.read_text(encoding='utf-8'))
+        return SavedCreature(
+            kind=data['kind'],
+            name=data['name'],
+            timestamp=data['timestamp'],
+            ticks=data.get('ticks', data['age'] * model.Creature.ticks_per_day),
+            maturity=data['maturity'],
+            params=data['params'],
+            history=model.History(retention=model.Creature.history_retention),
+            events=[],
+        )
+
+
+class SQLiteStorage(Storage):
+    """
+    Существа в базе SQLite.
+
+    Таблица creatures содержит текущее состояние каждого существа, checkpoints — полные состояния, сохраняемые раз в checkpoint_every сохранений, history — состояния истории, events — действия игрока.
+    Существу при первом сохранении присваивается идентификатор Creature.id.
+    Запись нескольких существ выполняется одной транзакцией (save_many).
+    """
+    multiple = True
+    schema = '''
+        CREATE TABLE IF NOT EXISTS creatures (
+            id INTEGER PRIMARY KEY,
+            owner TEXT,
+            kind TEXT NOT NULL,
+            name TEXT NOT NULL,
+            ticks INTEGER NOT NULL,
+            maturity INTEGER NOT NULL,
+            params TEXT NOT NULL,
+            columns TEXT NOT NULL DEFAULT '[]',
+            recorded INTEGER NOT NULL DEFAULT 0,
+            saves INTEGER NOT NULL DEFAULT 0,
+            saved_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS creatures_owner ON creatures (owner);
+        CREATE INDEX IF NOT EXISTS creatures_kind ON creatures (kind);
+        CREATE INDEX IF NOT EXISTS creatures_saved_at ON creatures (saved_at);
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            creature_id INTEGER NOT NULL REFERENCES creatures (id) ON DELETE CASCADE,
+            saved_at REAL NOT NULL,
+            ticks INTEGER NOT NULL,
+            maturity INTEGER NOT NULL,
+            params TEXT NOT NULL,
+            PRIMARY KEY (creature_id, saved_at)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS history (
+            creature_id INTEGER NOT NULL REFERENCES creatures (id) ON DELETE CASCADE,
+            seq INTEGER NOT NULL,
+            age INTEGER NOT NULL,
+            "values" BLOB NOT NULL,
+            PRIMARY KEY (creature_id, seq)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS events (
+            creature_id INTEGER NOT NULL REFERENCES creatures (id) ON DELETE CASCADE,
+            ticks INTEGER NOT NULL,
+            timestamp REAL NOT NULL,
+            action TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS events_creature ON events (creature_id, ticks);
+    '''
+
+    def __init__(
+            self,
+            path: str | Path,
+            owner: str = None,
+            checkpoint_every: int = 1000,
+    ):
+        self.path = Path(path)
+        self.owner = owner
+        self.checkpoint_every = checkpoint_every
+        self._lock = RLock()
+        import sqlite3
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode = WAL')
+        self._db.execute('PRAGMA synchronous = NORMAL')
+        self._db.execute('PRAGMA foreign_keys = ON')
+        self._db.executescript(self.schema)
+
+    def exists(self, creature_id: int = None) -> bool:
+        with self._lock:
+            if creature_id is not None:
+                query, args = 'SELECT 1 FROM creatures WHERE id = ?', (creature_id,)
+            elif self.owner is not None:
+                query, args = 'SELECT 1 FROM creatures WHERE owner = ? LIMIT 1', (self.owner,)
+            else:
+                query, args = 'SELECT 1 FROM creatures LIMIT 1', ()
+            return self._db.execute(query, args).fetchone() is not None
+
+    def save(self, creature: model.Creature, timestamp: float = None) -> None:
+        self.save_many((creature,), timestamp)
+
+    def save_many(self, creatures: Iterable[model.Creature], timestamp: float = None) -> None:
+        timestamp = time() if timestamp is None else timestamp
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                for creature in creatures:
+                    self._save(creature, timestamp)
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    def load(self, creature_id: int = None) -> SavedCreature:
+        with self._lock:
+            if creature_id is None:
+                creature_id = self._latest()
+            row = self._db.execute(
+                'SELECT kind, name, ticks, maturity, params, columns, recorded, saved_at FROM creatures WHERE id = ?',
+                (creature_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(creature_id)
+            kind, name, ticks, maturity, params, columns, recorded, saved_at = row
+            columns = jloads(columns)
+            ages, values = array('q'), {name_: array('d') for name_ in columns}
+            for age, blob in self._db.execute(
+                    'SELECT age, "values" FROM history WHERE creature_id = ? ORDER BY seq',
+                    (creature_id,)
+            ):
+                ages.append(age)
+                for name_, value in zip(columns, array('d', blob)):
+                    values[name_].append(value)
+            events = [
+                Event(*row)
+                for row in self._db.execute(
+                    'SELECT ticks, timestamp, action FROM events WHERE creature_id = ? ORDER BY rowid',
+                    (creature_id,)
+                )
+            ]
+        history = model.History.restore(ages, values, model.Creature.history_retention)
+        # номера состояний в таблице history продолжают нумерацию с учётом свёрнутых
+        history.recorded = recorded
+        return SavedCreature(
+            kind=kind,
+            name=name,
+            timestamp=saved_at,
+            ticks=ticks,
+            maturity=maturity,
+            params=jloads(params),
+            history=history,
+            events=events,
+            id=creature_id,
+        )
+
+    def log_event(self, creature: model.Creature, action: str, timestamp: float = None) -> None:
+        timestamp = time() if timestamp is None else timestamp
+        with self._lock:
+            if creature.id is None:
+                self.save(creature, timestamp)
+            self._db.execute(
+                'INSERT INTO events (creature_id, ticks, timestamp, action) VALUES (?, ?, ?, ?)',
+                (creature.id, creature.ticks, timestamp, action)
+            )
+
+    def ids(self, owner: str = None, kind: str = None) -> list[int]:
+        """Идентификаторы существ владельца owner и/или вида kind."""
+        conditions, args = [], []
+        if owner is not None:
+            conditions.append('owner = ?')
+            args.append(owner)
+        if kind is not None:
+            conditions.append('kind = ?')
+            args.append(kind)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self._lock:
+            return [row[0] for row in self._db.execute(f'SELECT id FROM creatures{where}', args)]
+
+    def stale(self, older_than: float) -> list[int]:
+        """Идентификаторы существ, не сохранявшихся с момента older_than (по индексу saved_at)."""
+        with self._lock:
+            return [
+                row[0]
+                for row in self._db.execute('SELECT id FROM creatures WHERE saved_at < ?', (older_than,))
+            ]
+
+    def delete(self, creature_id: int) -> None:
+        with self._lock:
+            self._db.execute('DELETE FROM creatures WHERE id = ?', (creature_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _latest(self) -> int:
+        if self.owner is None:
+            row = self._db.execute('SELECT id FROM creatures ORDER BY saved_at DESC LIMIT 1').fetchone()
+        else:
+            row = self._db.execute(
+                'SELECT id FROM creatures WHERE owner = ? ORDER BY saved_at DESC LIMIT 1',
+                (self.owner,)
+            ).fetchone()
+        if row is None:
+            raise KeyError('no saved creatures')
+        return row[0]
+
+    def _save(self, creature: model.Creature, timestamp: float) -> None:
+        params = jdumps({cls.__name__: param.value for cls, param in creature.params.items()})
+        history = creature.history
+        columns = history.columns
+        if creature.id is None:
+            creature.id = self._db.execute(
+                'INSERT INTO creatures (owner, kind, name, ticks, maturity, params, saved_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (self.owner, creature.kind.name, creature.name, creature.ticks, creature.mature.value, params, timestamp)
+            ).lastrowid
+            recorded, saves, stored_columns = 0, 0, []
+        else:
+            row = self._db.execute(
+                'SELECT recorded, saves, columns FROM creatures WHERE id = ?',
+                (creature.id,)
+            ).fetchone()
+            recorded, saves, stored_columns = row[0], row[1], jloads(row[2])
+        if list(columns) != stored_columns:
+            # состав столбцов изменился: история записывается заново
+            self._db.execute('DELETE FROM history WHERE creature_id = ?', (creature.id,))
+            recorded = 0
+        offset = history.recorded - len(history)
+        first = max(recorded, offset)
+        ages, values = history.export(first - offset)
+        self._db.executemany(
+            'INSERT OR REPLACE INTO history (creature_id, seq, age, "values") VALUES (?, ?, ?, ?)',
+            (
+                (creature.id, first + i, age, array('d', (values[name][i] for name in columns)).tobytes())
+                for i, age in enumerate(ages)
+            )
+        )
+        if history.retention is not None and offset:
+            # свёрнутые состояния в базе не храним: хранится то же окно, что и в памяти
+            self._db.execute('DELETE FROM history WHERE creature_id = ? AND seq < ?', (creature.id, offset))
+        saves += 1
+        self._db.execute(
+            'UPDATE creatures SET ticks = ?, maturity = ?, params = ?, columns = ?, recorded = ?, saves = ?, saved_at = ? '
+            'WHERE id = ?',
+            (creature.ticks, creature.mature.value, params, jdumps(list(columns)), history.recorded, saves, timestamp, creature.id)
+        )
+        if saves % self.checkpoint_every == 1 or self.checkpoint_every == 1:
+            self._db.execute(
+                'INSERT OR REPLACE INTO checkpoints (creature_id, saved_at, ticks, maturity, params) VALUES (?, ?, ?, ?, ?)',
+                (creature.id, timestamp, creature.ticks, creature.mature.value, params)
+            )
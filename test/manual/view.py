@@ -1,9 +1,13 @@
 from pathlib import Path
+from queue import Empty
+from time import monotonic
 from tkinter import Tk, PhotoImage, StringVar
 from tkinter.ttk import Frame, Button, Label
 
 import model
 import controller
+from images import ImageBank
+from simulation import Simulation
 
 
 class RootWidget(Tk):
@@ -23,6 +27,7 @@ class RootWidget(Tk):
         self.resizable(False, False)
 
         self.mainframe: Frame = None
+        self.images = ImageBank()
 
     def change_frame(self, new_frame: Frame):
         self.mainframe.destroy()
@@ -32,7 +37,7 @@ class RootWidget(Tk):
 
 class MainMenu(Frame):
     """"""
-    def __init__(self, master: RootWidget, kinds: controller.LoadKinds[model.Kind]):
+    def __init__(self, master: RootWidget, kinds: controller.LoadKinds[controller.KindEntry]):
         super().__init__(master)
         pad = master.width // 100 + 1
         self.grid(
@@ -44,25 +49,12 @@ class MainMenu(Frame):
         img_size = (master.width - pad*2*(columns+1)) // columns - 10
         self._images: list[PhotoImage] = []
         for i, kind in enumerate(kinds):
-            img = PhotoImage(file=kind.image)
-            img_width, img_height = img.width(), img.height()
-            if img_width != img_size or img_height != img_size:
-                img = _resize_image(
-                    img,
-                    img_width,
-                    img_height,
-                    img_size,
-                    img_size,
-                )
-            self._images.append(img)
+            self._images.append(master.images.get(kind.image, img_size, img_size))
             row, column = divmod(i, columns)
             btn = Button(
                 self,
                 image=self._images[i],
-                # для теста:
-                command=lambda: master.change_frame(Game(master, yara)),
-                # на перспективу:
-                # command=lambda: master.change_frame(Game(master, controller.MainMenu.choose_kind(kind))),
+                command=lambda kind=kind: self.start(kind),
             )
             btn.grid(
                 row=row, column=column,
@@ -70,8 +62,23 @@ class MainMenu(Frame):
                 padx=pad, pady=pad,
             )
 
+    def start(self, kind: controller.KindEntry) -> None:
+        """Создаёт существо выбранного вида и переходит к игре."""
+        creature = controller.MainMenu.choose_kind(kind)
+        game = Game(self.master, creature)
+        self.master.change_frame(game)
+        game.update_creature(creature)
+
+
 class Game(Frame):
     """"""
+    # наибольшая частота перерисовки
+    fps: int = 30
+    # наибольший период опроса снимков имитации, когда они не поступают
+    idle_poll_ms: int = 250
+    # частота смены кадров анимации
+    animation_fps: float = 8
+
     def __init__(self, master: RootWidget, origin: model.Creature):
         super().__init__(master)
         pad = (master.width // 100 + 1) * 2
@@ -137,6 +144,22 @@ class Game(Frame):
             pady=(0, pad),
         )
 
+        # показанные значения и значения, ожидающие перерисовки
+        self._shown: dict[str, object] = {}
+        self._pending: dict[str, object] = {}
+        self._render_job: str | None = None
+        self._last_render = 0.0
+        self._poll_ms = 1000 // self.fps
+        self._poll_job: str | None = None
+        self._atlas = master.images.atlas(origin.kind.sprites, self._screen_size)
+        self._activity: str | None = None
+        self.simulation = Simulation(
+            origin,
+            controller.App.clock(),
+            log_action=controller.LoadCreature.log_action,
+            autosave=controller.LoadCreature.autosave(),
+            events=controller.LoadCreature.events(origin),
+        )
         self.create_buttons(origin)
 
     def create_buttons(self, origin: model.Creature):
@@ -155,17 +178,7 @@ class Game(Frame):
                 action = origin.player_actions[i]
             except IndexError:
                 action = model.NoAction()
-            img = PhotoImage(file=action.image)
-            img_width, img_height = img.width(), img.height()
-            if img_width != img_size or img_height != img_size:
-                img = _resize_image(
-                    img,
-                    img_width,
-                    img_height,
-                    img_size,
-                    img_size,
-                )
-            self._buttons_images.append(img)
+            self._buttons_images.append(self.master.images.get(action.image, img_size, img_size))
             btn = Button(
                 buttons_panel,
                 image=self._buttons_images[-1],
@@ -173,7 +186,7 @@ class Game(Frame):
                 # необходимо добавить параметр в lambda-функцию, чтобы каждая из создаваемых в цикле функций обращалась к соответствующему экземпляру action
                 # иначе, функции обращаются к action только во время вызова, а не в момент создания
                 # https://docs.python.org/3/faq/programming.html#why-do-lambdas-defined-in-a-loop-with-different-values-all-return-the-same-result
-                command=lambda act=action: self.change_message(f'{act}\n{act.action()}'),
+                command=lambda act=action: self.player_action(act),
             )
             btn.grid(
                 row=0, column=i,
@@ -182,58 +195,110 @@ class Game(Frame):
             )
             self.actions.append(btn)
 
+    def player_action(self, action: model.Action) -> None:
+        self.simulation.player_action(action)
+        # ответ на действие игрока ожидается сразу
+        self._poll_ms = 1000 // self.fps
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = self.after(self._poll_ms, self.drain)
+
     def change_message(self, text: str) -> None:
-        self.message.set(text)
-        self.update_idletasks()
+        self.render(message=text)
 
     def change_params(self, text: str) -> None:
-        self.params.set(text)
-        self.update_idletasks()
+        self.render(params=text)
 
     def change_image(self, img_path: str | Path) -> None:
-        self._image = PhotoImage(file=img_path)
-        img_width, img_height = self._image.width(), self._image.height()
-        if img_width != self._screen_size or img_height != self._screen_size:
-            self._image = _resize_image(
-                self._image,
-                img_width,
-                img_height,
-                self._screen_size,
-                self._screen_size,
-            )
+        self.render(image=img_path)
+
+    def render(self, **values) -> None:
+        """
+        Запоминает новые значения для показа: message, params, image, frame.
+
+        Все изменения между перерисовками применяются одним вызовом after_idle не чаще fps раз в секунду; виджеты, значения которых не изменились, не затрагиваются.
+        """
+        self._pending.update(values)
+        if self._render_job is None:
+            delay = max(self._last_render + 1 / self.fps - monotonic(), 0)
+            self._render_job = self.after(round(delay * 1000), self._schedule_flush)
+
+    def _schedule_flush(self) -> None:
+        # номер задания сохраняется, чтобы destroy мог отменить и его
+        self._render_job = self.after_idle(self._flush)
+
+    def _flush(self) -> None:
+        self._render_job = None
+        self._last_render = monotonic()
+        pending, self._pending = self._pending, {}
+        for name, value in pending.items():
+            if self._shown.get(name, self) != value:
+                self._shown[name] = value
+                getattr(self, f'_show_{name}')(value)
+
+    def _show_message(self, text: str) -> None:
+        self.message.set(text)
+
+    def _show_params(self, text: str) -> None:
+        self.params.set(text)
+
+    def _show_frame(self, frame: PhotoImage) -> None:
+        self._image = frame
+        self.screen.configure(image=frame)
+
+    def _show_image(self, img_path: str | Path) -> None:
+        self._image = self.master.images.get(img_path, self._screen_size, self._screen_size)
         self.screen.configure(image=self._image)
-        self.update_idletasks()
 
     def update_creature(self, origin: model.Creature):
-        origin.update()
-        self.change_params(repr(origin))
-        self.after(1000, lambda: self.update_creature(origin))
-        self.update()
+        """Запускает имитацию существа в фоновом потоке и показ её снимков."""
+        if not self.simulation.is_alive():
+            self.simulation.start()
+        self.drain()
 
+    def drain(self):
+        """
+        Передаёт последний снимок состояния и кадр анимации на перерисовку.
 
-def _resize_image(
-        image: PhotoImage,
-        old_width: int,
-        old_height: int,
-        new_width: int,
-        new_height: int
-) -> PhotoImage:
-    resized_image = PhotoImage(width=new_width, height=new_height)
-    for x in range(new_width):
-        for y in range(new_height):
-            x_old = x * old_width // new_width
-            y_old = y * old_height // new_height
-            rgb = '#{:02x}{:02x}{:02x}'.format(*image.get(x_old, y_old))
-            resized_image.put(rgb, (x, y))
-    return resized_image
+        Кадр анимации текущей активности выбирается по игровым часам.
+        Пока снимки не поступают и анимация не идёт, период опроса удваивается до idle_poll_ms, чтобы окно без изменений почти не занимало процессор.
+        """
+        snapshot = None
+        try:
+            while True:
+                snapshot = self.simulation.snapshots.get_nowait()
+                if snapshot.messages:
+                    self.change_message(snapshot.messages[-1])
+        except Empty:
+            pass
+        if snapshot is not None:
+            self.change_params(snapshot.text)
+            self._activity = snapshot.activity
+        name = self._activity if self._activity in self._atlas else 'idle'
+        self.render(frame=self._atlas.frame(name, self.simulation.clock.elapsed(), self.animation_fps))
+        if snapshot is None and len(self._atlas.frames(name)) == 1:
+            self._poll_ms = min(self._poll_ms * 2, self.idle_poll_ms)
+        else:
+            self._poll_ms = 1000 // self.fps
+        self._poll_job = self.after(self._poll_ms, self.drain)
 
+    def destroy(self):
+        # опрос снимков и перерисовка не должны срабатывать после уничтожения виджетов
+        for job in (self._poll_job, self._render_job):
+            if job is not None:
+                self.after_cancel(job)
+        self._poll_job = self._render_job = None
+        if self.simulation.is_alive():
+            self.simulation.stop()
+        super().destroy()
 
-if __name__ == '__main__':
+
+def main():
     root = RootWidget()
 
     # root.mainframe = MainMenu(root, controller.loaded_kinds)
 
-    yara = model.Creature(model.cat_kind, 'Яра')
+    yara = controller.MainMenu.choose_kind(controller.loaded_kinds[0], 'Яра')
     root.mainframe = Game(root, yara)
     root.mainframe.change_message('\n'.join(str(act) for act in yara.player_actions))
     root.mainframe.change_image(r'd:\G-Doc\TOP Academy\Python web\321\projects\2\_ref\doc\.img_refs\dog_1.png')
@@ -241,3 +306,6 @@ if __name__ == '__main__':
 
     root.mainloop()
 
+
+if __name__ == '__main__':
+    main()